@@ -2,17 +2,23 @@
 # ✅ Controle de Tarefas v4.0 — Kanban + AI + Logs + UI moderna
 # ============================================================
 
+import os
+import tempfile
+import time
+import uuid
 import streamlit as st
 import pandas as pd
 import bcrypt
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-from models.tarefa import Tarefa
-from models.dashboard import Dashboard
+from models.tarefa import Tarefa, CATEGORIAS, STATUS
 from models.interface_ui import InterfaceUI
-from models.ai_insights import AIInsights
-from models.kanban_board import KanbanBoard
-from services.google_sheets_service import GoogleSheetsService
+from services import instrumentacao
+from services.aquecimento import Aquecimento
+from services.gravacoes import GravacoesOrdenadas
+# demais models/services (plotly, textblob, gspread/google-auth...) são importados
+# só quando a página ou o recurso que os usa é renderizado pela primeira vez
 
 # -----------------------------
 # Configurações iniciais + CSS
@@ -31,6 +37,9 @@ if "user" not in st.session_state:
 if st.session_state["user"] is None:
     with st.container():
         InterfaceUI.header("🔐 Login de Usuário")
+        aviso = st.session_state.pop("aviso_logout", None)
+        if aviso:
+            InterfaceUI.info(aviso)
         c1, c2 = st.columns([1, 1])
         with c1:
             username_input = st.text_input("Usuário", placeholder="ex: tuliocv")
@@ -54,161 +63,218 @@ nome = st.session_state["user"]
 with st.sidebar:
     st.success(f"Bem-vindo(a), {nome}! 👋")
     if st.button("Sair", use_container_width=True):
+        aquecimento = st.session_state.pop("aquecimento", None)
+        if aquecimento is not None and aquecimento.ativo:
+            aquecimento.cancelar()
+            st.session_state["aviso_logout"] = "Pré-carregamento dos dados cancelado."
+        for caminho in st.session_state.pop("exportacoes", {}).values():
+            if os.path.exists(caminho):
+                os.remove(caminho)
         st.session_state["user"] = None
         st.rerun()
 
 # -----------------------------
-# Conexão com Google Sheets
+# Conexão com o armazenamento
 # -----------------------------
 @st.cache_resource
 def get_service():
+    from services.google_sheets_service import GoogleSheetsService
+    from services.sqlite_service import SQLiteService
+
     sheet_id = st.secrets["sheets"]["sheet_name"]  # <- é o ID da planilha
-    return GoogleSheetsService(sheet_id)
+    instrumentacao.configurar(st.secrets.get("instrumentacao", {}).get("trace"))  # JSONL opcional
+    sheets = GoogleSheetsService(sheet_id)
+    config = st.secrets.get("storage", {})
+    if config.get("backend") == "sqlite":
+        # leituras locais; a planilha recebe as escritas em segundo plano
+        return SQLiteService(config.get("path", "tarefas.db"), replica=sheets)
+    return sheets
+
+storage = get_service()
+
+# show_spinner=False: também são chamados pelas threads de aquecimento
+@st.cache_resource(show_spinner=False)
+def get_motor_sentimento():
+    from models.sentimento import MotorSentimento
+    return MotorSentimento()
+
+@st.cache_resource
+def get_executor():
+    # compartilhado entre as sessões: tarefas diferentes gravam em paralelo e
+    # as gravações de uma mesma tarefa seguem a ordem dos cliques
+    return GravacoesOrdenadas(ThreadPoolExecutor(max_workers=4, thread_name_prefix="kanban"))
+
+@st.cache_resource(show_spinner=False)
+def get_cubo():
+    from models.cubo_tarefas import CuboTarefas
+    return CuboTarefas()
+
+@st.cache_resource(show_spinner=False)
+def get_analise_ciclo():
+    from models.analise_ciclo import AnaliseCiclo
+    # a posição nos logs só vale para a fonte em que foi lida: um cache por backend
+    backend = st.secrets.get("storage", {}).get("backend", "sheets")
+    return AnaliseCiclo(f"ciclo_cache_{backend}.json")
 
-sheets_service = get_service()
-sheet = sheets_service.sheet
+@st.cache_resource
+def get_executor_aquecimento():
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="aquecimento")
 
 # -----------------------------
 # Utilitários
 # -----------------------------
-@st.cache_data(ttl=60)
-def get_headers():
-    try:
-        return [h.strip().lower() for h in sheet.row_values(1)]
-    except Exception:
-        return []
-
-def ensure_column(df: pd.DataFrame, col: str, fill=""):
-    if col not in df.columns:
-        df[col] = fill
-    return df
-
-def id_to_row_map():
-    values = sheet.get_all_values()
-    if not values:
-        return {}
-    headers = [h.strip().lower() for h in values[0]]
-    try:
-        id_idx = headers.index("id")
-    except ValueError:
-        return {}
-    mapping = {}
-    for i, row in enumerate(values[1:], start=2):
-        if len(row) > id_idx and row[id_idx]:
-            mapping[row[id_idx]] = i
-    return mapping
-
-def update_row_fields(row_num: int, updates: dict, usuario: str = "Sistema"):
-    """Atualiza campos, carimba 'ultima_atualizacao' e registra logs por campo alterado."""
-    headers = get_headers()
-    if not headers or not row_num:
-        return False
-
-    # captura valor anterior
-    valores_antigos = sheet.row_values(row_num)
-    if len(valores_antigos) < len(headers):
-        valores_antigos += [""] * (len(headers) - len(valores_antigos))
-    antigo_dict = dict(zip(headers, valores_antigos))
-
-    # atualiza campos com log
-    for k, v in updates.items():
-        kl = k.strip().lower()
-        if kl in headers:
-            col_idx = headers.index(kl) + 1
-            antigo = antigo_dict.get(kl, "")
-            novo = "" if v is None else str(v)
-            if str(antigo) != novo:
-                sheet.update_cell(row_num, col_idx, novo)
-                sheets_service.registrar_log(
-                    usuario=usuario,
-                    id_tarefa=antigo_dict.get("id", "N/A"),
-                    campo=kl,
-                    valor_antigo=antigo,
-                    valor_novo=novo
-                )
-
-    # atualiza timestamp + log
-    if "ultima_atualizacao" in headers:
-        col_idx = headers.index("ultima_atualizacao") + 1
-        agora = datetime.now().strftime("%d/%m/%Y %H:%M")
-        sheet.update_cell(row_num, col_idx, agora)
-        sheets_service.registrar_log(
-            usuario=usuario,
-            id_tarefa=antigo_dict.get("id", "N/A"),
-            campo="ultima_atualizacao",
-            valor_antigo=antigo_dict.get("ultima_atualizacao", ""),
-            valor_novo=agora
-        )
-    return True
-
-def append_row_with_history(tarefa: Tarefa, autor: str, historico: str):
-    """Adiciona nova linha conforme a ordem oficial de colunas."""
-    nova_linha = tarefa.to_list() + [historico or "", "", autor]
-    sheet.append_row(nova_linha)
-    # log de criação
-    try:
-        sheets_service.registrar_log(autor, tarefa.id, "criação", "", f"Tarefa '{tarefa.titulo}' criada")
-    except Exception:
-        pass
+# colunas que cada página lê (evita baixar o 'historico' onde ele não aparece)
+COLUNAS_LISTA = ["id", "titulo", "categoria", "prazo", "status", "autor", "data_criacao"]
+COLUNAS_KANBAN = ["id", "titulo", "categoria", "prazo", "status", "autor"]
+COLUNAS_ANALYTICS = ["id", "data_criacao", "categoria", "status", "autor"]
+COLUNAS_INSIGHTS = ["id", "categoria", "status", "historico", "autor"]
+
+TAMANHO_PAGINA_LOGS = 200
+
+def carregar_pagina_de_logs(estado: dict):
+    usuario, id_contem = estado["filtros"]
+    pagina, estado["cursor"] = storage.pagina_de_logs(
+        cursor=estado["cursor"],
+        tamanho=TAMANHO_PAGINA_LOGS,
+        usuario=None if usuario == "(todos)" else usuario,
+        id_contem=id_contem or None,
+    )
+    estado["paginas"].append(pagina)
 
 def cor_status(status: str):
     return {"Concluída": "#90EE90", "Em andamento": "#FFD700"}.get(status, "#F08080")
 
-def append_note_to_history(row_num: int, usuario: str, nota: str, acao: str = ""):
-    """Concatena nota no campo 'historico' com timestamp/autor."""
-    headers = get_headers()
-    if "historico" not in headers:
-        return
-    idx_hist = headers.index("historico") + 1
-    texto_atual = sheet.cell(row_num, idx_hist).value or ""
-    stamp = datetime.now().strftime("%d/%m/%Y %H:%M")
-    linha = f"[{stamp}] {usuario}: {acao} {nota}".strip()
-    novo_texto = (texto_atual + ("\n" if texto_atual else "") + linha)
-    sheet.update_cell(row_num, idx_hist, novo_texto)
-    sheets_service.registrar_log(usuario, sheet.cell(row_num, headers.index("id") + 1).value, "historico", texto_atual, novo_texto)
+ORDENACOES_LISTA = {"Prazo": "prazo", "Criação": "data_criacao", "Título": "titulo", "Status": "status"}
+TAMANHOS_PAGINA_LISTA = [10, 25, 50, 100]
+
+def ordenar_tarefas(df: pd.DataFrame, coluna: str, decrescente: bool) -> pd.DataFrame:
+    """Ordena antes de paginar; datas usam as colunas `_dt` já tipadas, vazias por último."""
+    if f"{coluna}_dt" in df.columns:
+        return df.sort_values(f"{coluna}_dt", ascending=not decrescente, na_position="last", kind="stable")
+    chave = lambda s: s.astype(str).str.lower()
+    return df.sort_values(coluna, ascending=not decrescente, key=chave, na_position="last", kind="stable")
+
+# um arquivo por sessão e tipo, reaproveitado a cada exportação; os de sessões
+# que terminaram sem logout são apagados depois de VALIDADE_EXPORTACAO segundos
+DIR_EXPORTACOES = os.path.join(tempfile.gettempdir(), "controle_tarefas_csv")
+VALIDADE_EXPORTACAO = 3600
+
+def limpar_exportacoes_antigas():
+    limite = time.time() - VALIDADE_EXPORTACAO
+    with os.scandir(DIR_EXPORTACOES) as entradas:
+        for entrada in entradas:
+            try:
+                if entrada.stat().st_mtime < limite:
+                    os.remove(entrada.path)
+            except FileNotFoundError:
+                pass  # outra sessão limpou antes
+
+def botao_exportar(tipo: str, rotulo: str, nome_arquivo: str, autor: str = None):
+    """Gera o CSV num arquivo temporário (bloco a bloco) e só então oferece o download."""
+    chave = f"exportacao_{tipo}"
+    exportacoes = st.session_state.setdefault("exportacoes", {})  # tipo -> caminho
+    if st.button(rotulo, use_container_width=True, key=f"{chave}_gerar"):
+        os.makedirs(DIR_EXPORTACOES, exist_ok=True)
+        limpar_exportacoes_antigas()
+        caminho = exportacoes.get(tipo) or os.path.join(DIR_EXPORTACOES, f"{uuid.uuid4().hex}_{tipo}.csv")
+        with st.spinner("Gerando CSV..."):
+            with open(f"{caminho}.tmp", "w", encoding="utf-8", newline="") as f:
+                storage.exportar_csv(f, tipo, autor=autor)
+            os.replace(f"{caminho}.tmp", caminho)
+        exportacoes[tipo] = caminho
+    caminho = exportacoes.get(tipo)
+    if caminho and os.path.exists(caminho):
+        with open(caminho, "rb") as f:
+            st.download_button(
+                "💾 Baixar arquivo", data=f, file_name=nome_arquivo, mime="text/csv",
+                use_container_width=True, key=f"{chave}_baixar"
+            )
 
-# ------------------------------------------------------------
-# Navegação
-# ------------------------------------------------------------
-aba = st.sidebar.radio(
-    "📍 Navegação",
-    ["Nova Tarefa", "Minhas Tarefas", "Kanban", "Analytics", "AI Insights", "Atualizar Tarefa", "Logs"]
-)
+# -----------------------------
+# Aquecimento após o login
+# -----------------------------
+def iniciar_aquecimento() -> Aquecimento:
+    """Tarefas e Logs são lidos em paralelo; com as tarefas em mãos, os agregados do
+    Dashboard, o sentimento dos históricos e o índice de busca são calculados. As abas
+    depois só encontram caches quentes (storage, cubo, análise de ciclo, sentimento, busca)."""
+    aquecimento = Aquecimento(get_executor_aquecimento())
+    aquecimento.iniciar(
+        "tarefas", lambda: storage.carregar_tarefas(autor=nome),
+        depois={
+            "dashboard": lambda df: get_cubo().atualizar(df, autor=nome),
+            "sentimento": lambda df: get_motor_sentimento().pontuar(
+                storage.materializar_historico(df[COLUNAS_INSIGHTS])["historico"].astype(str).tolist()
+            ),
+            "busca": lambda df: storage.preparar_busca(nome),
+        },
+    )
+    aquecimento.iniciar("logs", lambda: (storage.usuarios_nos_logs(), get_analise_ciclo().atualizar(storage)))
+    return aquecimento
+
+if "aquecimento" not in st.session_state:
+    st.session_state["aquecimento"] = iniciar_aquecimento()
+aquecimento = st.session_state["aquecimento"]
+if aquecimento.ativo:
+    with st.sidebar:
+        feitas, total = aquecimento.progresso()
+        st.caption(f"⏳ Pré-carregando dados ({feitas}/{total})...")
+        if st.button("Cancelar pré-carregamento", use_container_width=True):
+            aquecimento.cancelar()
+            st.rerun()
 
 # ------------------------------------------------------------
 # ➕ Nova Tarefa
 # ------------------------------------------------------------
-if aba == "Nova Tarefa":
+def pagina_nova_tarefa():
+    from models.importador_csv import ImportadorCSV
+
     InterfaceUI.section("➕ Adicionar Nova Tarefa")
     col1, col2 = st.columns([2, 1])
     with col1:
         titulo = st.text_input("Título da tarefa")
         historico = st.text_area("Histórico (opcional)", height=140, placeholder="Observações, contexto, links...")
     with col2:
-        categoria = st.selectbox("Categoria", ["Pessoal", "Trabalho", "Estudo", "Outro"])
+        categoria = st.selectbox("Categoria", CATEGORIAS)
         prazo = st.date_input("Prazo")
 
     if st.button("Salvar tarefa", type="primary", use_container_width=True):
         if titulo.strip():
             tarefa = Tarefa(titulo.strip(), categoria, prazo.strftime("%d/%m/%Y"))
-            append_row_with_history(tarefa, nome, historico)
+            storage.adicionar_tarefa(tarefa, nome, historico)
             InterfaceUI.success(f"Tarefa criada com sucesso ✅ (ID: {tarefa.id})")
         else:
             InterfaceUI.warn("⚠️ Preencha o título antes de salvar.")
 
+    with st.expander("📦 Importar / exportar em lote"):
+        st.caption("CSV com as colunas titulo, categoria, prazo (dd/mm/aaaa) e, opcionalmente, historico.")
+        arquivo = st.file_uploader("Arquivo CSV", type=["csv"])
+        if arquivo is not None and st.button("📥 Importar tarefas", use_container_width=True):
+            importador = ImportadorCSV(arquivo, existentes=set(storage.carregar_tarefas(columns=["id"])["id"]))
+            faltando = importador.validar_colunas()
+            if faltando:
+                InterfaceUI.error(f"Colunas obrigatórias ausentes: {', '.join(faltando)}")
+            else:
+                gravadas = 0
+                with st.spinner("Importando..."):
+                    for lote in importador.blocos():
+                        tarefas, historicos = zip(*lote)
+                        gravadas += storage.adicionar_tarefas(list(tarefas), nome, list(historicos))
+                InterfaceUI.success(f"{gravadas} de {importador.lidas} tarefa(s) importada(s) ✅")
+                if importador.invalidas:
+                    InterfaceUI.warn(f"⚠️ {importador.invalidas} linha(s) ignorada(s):")
+                    st.code("\n".join(importador.erros))
+        botao_exportar("tarefas", "⬇️ Exportar minhas tarefas (CSV)", "tarefas.csv", autor=nome)
+
 # ------------------------------------------------------------
 # 📋 Minhas Tarefas (lista)
 # ------------------------------------------------------------
-elif aba == "Minhas Tarefas":
+def pagina_minhas_tarefas():
     InterfaceUI.section("📋 Suas Tarefas")
-    df = sheets_service.carregar_tarefas()
-    df = ensure_column(df, "autor", "")
-    df = ensure_column(df, "historico", "")
+    df = storage.carregar_tarefas(columns=COLUNAS_LISTA, autor=nome)
 
     if df.empty:
         InterfaceUI.info("Nenhuma tarefa cadastrada ainda.")
     else:
-        df = df[df["autor"].astype(str).str.strip().str.lower() == nome.strip().lower()]
         c1, c2, c3 = st.columns([1, 1, 1])
         with c1:
             filtro_categoria = st.multiselect("Categoria", sorted(df["categoria"].dropna().unique().tolist()))
@@ -216,16 +282,51 @@ elif aba == "Minhas Tarefas":
             filtro_status = st.multiselect("Status", sorted(df["status"].dropna().unique().tolist()))
         with c3:
             if st.button("🔄 Atualizar lista", use_container_width=True):
-                st.cache_data.clear()
+                storage.invalidar_cache()
                 st.rerun()
+        busca = st.text_input("🔎 Buscar no título e histórico", placeholder="ex.: relatório mensal").strip()
+        c1, c2, c3 = st.columns([1, 1, 1])
+        with c1:
+            ordem = st.selectbox("Ordenar por", list(ORDENACOES_LISTA), help="Com busca ativa a ordem é a de relevância.")
+        with c2:
+            decrescente = st.toggle("Decrescente", value=False)
+        with c3:
+            por_pagina = st.selectbox("Tarefas por página", TAMANHOS_PAGINA_LISTA, index=1)
 
         if filtro_categoria:
             df = df[df["categoria"].isin(filtro_categoria)]
         if filtro_status:
             df = df[df["status"].isin(filtro_status)]
+        if busca:
+            ids = storage.buscar_tarefas(busca, nome)
+            df = df.set_index("id", drop=False)
+            df = df.loc[[i for i in ids if i in df.index]].reset_index(drop=True)
+            if decrescente:
+                df = df.iloc[::-1]
+        else:
+            df = ordenar_tarefas(df, ORDENACOES_LISTA[ordem], decrescente)
+
+        # página volta para 1 quando busca/filtros/ordenação mudam
+        assinatura = (busca, tuple(filtro_categoria), tuple(filtro_status), ordem, decrescente, por_pagina)
+        paginacao = st.session_state.setdefault("lista_paginacao", {"assinatura": None, "pagina": 1})
+        if paginacao["assinatura"] != assinatura:
+            paginacao.update(assinatura=assinatura, pagina=1)
+        n_paginas = max(1, -(-len(df) // por_pagina))
+        c1, c2, c3 = st.columns([1, 3, 1])
+        with c1:
+            if st.button("◀ Anterior", use_container_width=True, disabled=paginacao["pagina"] <= 1):
+                paginacao["pagina"] -= 1
+        with c3:
+            if st.button("Próxima ▶", use_container_width=True, disabled=paginacao["pagina"] >= n_paginas):
+                paginacao["pagina"] += 1
+        paginacao["pagina"] = min(max(paginacao["pagina"], 1), n_paginas)
+        with c2:
+            st.caption(f"Página {paginacao['pagina']} de {n_paginas} • {len(df)} tarefa(s)")
 
-        for _, row in df.iterrows():
-            InterfaceUI.task_card(
+        inicio = (paginacao["pagina"] - 1) * por_pagina
+        pagina = df.iloc[inicio:inicio + por_pagina]
+        InterfaceUI.task_cards([
+            dict(
                 titulo=row.get("titulo", ""),
                 categoria=row.get("categoria", ""),
                 status=row.get("status", ""),
@@ -233,63 +334,90 @@ elif aba == "Minhas Tarefas":
                 autor=row.get("autor", nome),
                 data_criacao=row.get("data_criacao", ""),
                 cor=cor_status(row.get("status", "Pendente")),
-                historico=row.get("historico", "")
             )
+            for row in pagina.to_dict("records")
+        ])
+
+        # histórico fica recolhido: só é lido/materializado para a tarefa escolhida
+        if not pagina.empty:
+            titulos = dict(zip(pagina["id"], pagina["titulo"]))
+            escolhida = st.selectbox(
+                "📜 Ver histórico de", [""] + list(titulos),
+                format_func=lambda i: titulos.get(i, "—")
+            )
+            if escolhida:
+                bases = storage.carregar_tarefas(columns=["id", "historico"], autor=nome)
+                base = bases.loc[bases["id"] == escolhida, "historico"]
+                historico = storage.historico_de(escolhida, base.iloc[0] if len(base) else "")
+                st.text(historico or "Sem histórico registrado.")
 
 # ------------------------------------------------------------
 # 🗂 Kanban
 # ------------------------------------------------------------
-elif aba == "Kanban":
+def pagina_kanban():
+    from models.kanban_board import KanbanBoard
+
     InterfaceUI.section("🗂 Kanban de Tarefas")
-    df = sheets_service.carregar_tarefas()
+    df = storage.carregar_tarefas(columns=COLUNAS_KANBAN, autor=nome)
     if df.empty:
         InterfaceUI.info("Nenhuma tarefa cadastrada ainda.")
-        st.stop()
-
-    df = df[df["autor"].astype(str).str.strip().str.lower() == nome.strip().lower()]
-
-    def mover_callback(task_id: str, novo_status: str, nota: str):
-        # resolve linha
-        row_map = id_to_row_map()
-        row_num = row_map.get(task_id)
-        if not row_num:
-            InterfaceUI.error("Tarefa não encontrada na planilha.")
-            return
-        # atualiza status + opcionalmente histórico
-        update_row_fields(row_num, {"status": novo_status}, usuario=nome)
-        if nota.strip():
-            append_note_to_history(row_num, usuario=nome, nota=nota, acao=f"[Kanban] → {novo_status}")
-
-    KanbanBoard(df).render(on_move=mover_callback)
+    else:
+        def mover_callback(task_id: str, novo_status: str, nota: str) -> bool:
+            # roda em segundo plano: atualiza status + opcionalmente histórico
+            if not storage.atualizar_tarefa(task_id, {"status": novo_status}, usuario=nome):
+                return False
+            if nota.strip():
+                storage.adicionar_nota(task_id, usuario=nome, nota=nota, acao=f"[Kanban] → {novo_status}")
+            return True
+
+        def mover_lote_callback(task_ids: list, novo_status: str, nota: str) -> list:
+            # um batch_update para todos os status/carimbos e um append para as notas
+            movidas = storage.atualizar_tarefas(task_ids, {"status": novo_status}, usuario=nome)
+            if movidas and nota.strip():
+                storage.adicionar_notas(movidas, usuario=nome, nota=nota, acao=f"[Kanban] → {novo_status}")
+            return movidas
+
+        KanbanBoard(df).render_otimista(
+            on_move=mover_callback, executor=get_executor(), on_move_lote=mover_lote_callback
+        )
 
 # ------------------------------------------------------------
 # 📊 Analytics
 # ------------------------------------------------------------
-elif aba == "Analytics":
+def pagina_analytics():
+    from models.dashboard import Dashboard  # plotly
+
     InterfaceUI.section("📊 Dashboard de Tarefas")
-    df = sheets_service.carregar_tarefas()
+    df = storage.carregar_tarefas(columns=COLUNAS_ANALYTICS, autor=nome)
     if df.empty:
         InterfaceUI.info("Nenhum dado disponível ainda.")
     else:
-        df = df[df["autor"].astype(str).str.strip().str.lower() == nome.strip().lower()]
-        dash = Dashboard(df)
+        # o cubo é compartilhado: só as tarefas alteradas desde a última visita são reagregadas
+        cubo = get_cubo()
+        cubo.atualizar(df, autor=nome)
+        dash = Dashboard(cubo=cubo, autor=nome)
         dash.kpi_cards()
-        dash.tempo_medio_conclusao()
         dash.grafico_evolucao()
         dash.grafico_categoria()
         dash.grafico_status()
 
+        InterfaceUI.hr()
+        ciclo = get_analise_ciclo()
+        ciclo.atualizar(storage)  # lê só os logs novos, em blocos
+        dash.tempo_de_ciclo(ciclo.resumo(df["id"]))
+
 # ------------------------------------------------------------
 # 🧠 AI Insights
 # ------------------------------------------------------------
-elif aba == "AI Insights":
+def pagina_ai_insights():
+    from models.ai_insights import AIInsights  # textblob
+
     InterfaceUI.section("🧠 Insights Automáticos")
-    df = sheets_service.carregar_tarefas()
+    df = storage.carregar_tarefas(columns=COLUNAS_INSIGHTS, autor=nome)
     if df.empty:
         InterfaceUI.info("Nenhum dado disponível ainda.")
     else:
-        df = df[df["autor"].astype(str).str.strip().str.lower() == nome.strip().lower()]
-        ai = AIInsights(df)
+        ai = AIInsights(storage.materializar_historico(df), motor=get_motor_sentimento())
         ai.sentimento_historico()
         InterfaceUI.hr()
         ai.recomendacoes()
@@ -297,91 +425,116 @@ elif aba == "AI Insights":
 # ------------------------------------------------------------
 # ✍️ Atualizar Tarefa
 # ------------------------------------------------------------
-elif aba == "Atualizar Tarefa":
+def pagina_atualizar_tarefa():
     InterfaceUI.section("✍️ Atualizar Tarefas")
-    df = sheets_service.carregar_tarefas()
-    if df.empty:
-        InterfaceUI.info("Nenhuma tarefa cadastrada ainda.")
-        st.stop()
-    df_user = df[df["autor"].astype(str).str.strip().str.lower() == nome.strip().lower()]
+    df_user = storage.carregar_tarefas(autor=nome)
     if df_user.empty:
         InterfaceUI.info("Você ainda não possui tarefas.")
-        st.stop()
-
-    st.dataframe(df_user[["id", "titulo", "categoria", "prazo", "status", "historico"]], use_container_width=True)
-    tarefa_id = st.selectbox("Selecione a tarefa:", df_user["id"].tolist())
-
-    tarefa = df_user[df_user["id"] == tarefa_id].iloc[0]
-    novo_titulo = st.text_input("Título", value=tarefa["titulo"])
-    categorias_padrao = ["Pessoal", "Trabalho", "Estudo", "Outro"]
-    idx_cat = categorias_padrao.index(tarefa["categoria"]) if tarefa["categoria"] in categorias_padrao else 0
-    nova_categoria = st.selectbox("Categoria", categorias_padrao, index=idx_cat)
-
-    # data robusta
-    try:
-        prazo_value = pd.to_datetime(tarefa["prazo"], dayfirst=True, errors="coerce")
-        if pd.isna(prazo_value):
-            prazo_value = datetime.today()
-    except Exception:
-        prazo_value = datetime.today()
-    novo_prazo = st.date_input("Prazo", value=prazo_value)
-
-    status_padrao = ["Pendente", "Em andamento", "Concluída"]
-    idx_status = status_padrao.index(tarefa["status"]) if tarefa["status"] in status_padrao else 0
-    novo_status = st.selectbox("Status", status_padrao, index=idx_status)
-
-    novo_hist = st.text_area("Histórico", value=tarefa.get("historico", ""), height=150)
-
-    if st.button("💾 Salvar alterações", type="primary"):
-        updates = {
-            "titulo": novo_titulo,
-            "categoria": nova_categoria,
-            "prazo": novo_prazo.strftime("%d/%m/%Y"),
-            "status": novo_status,
-            "historico": novo_hist,
-        }
-        row_map = id_to_row_map()
-        row_num = row_map.get(tarefa_id)
-        if row_num:
-            ok = update_row_fields(row_num, updates, usuario=nome)
-            if ok:
+    else:
+        st.dataframe(df_user[["id", "titulo", "categoria", "prazo", "status", "historico"]], use_container_width=True)
+        tarefa_id = st.selectbox("Selecione a tarefa:", df_user["id"].tolist())
+
+        tarefa = df_user[df_user["id"] == tarefa_id].iloc[0]
+        novo_titulo = st.text_input("Título", value=tarefa["titulo"])
+        idx_cat = CATEGORIAS.index(tarefa["categoria"]) if tarefa["categoria"] in CATEGORIAS else 0
+        nova_categoria = st.selectbox("Categoria", CATEGORIAS, index=idx_cat)
+
+        # prazo já vem parseado pelo storage (NaT se vazio/inválido)
+        prazo_value = tarefa["prazo_dt"] if not pd.isna(tarefa["prazo_dt"]) else datetime.today()
+        novo_prazo = st.date_input("Prazo", value=prazo_value)
+
+        idx_status = STATUS.index(tarefa["status"]) if tarefa["status"] in STATUS else 0
+        novo_status = st.selectbox("Status", STATUS, index=idx_status)
+
+        novo_hist = st.text_area("Histórico", value=tarefa.get("historico", ""), height=150)
+        notas = storage.historico_de(tarefa_id)
+        if notas:
+            with st.expander("🗒️ Notas registradas"):
+                st.text(notas)
+
+        if st.button("💾 Salvar alterações", type="primary"):
+            updates = {
+                "titulo": novo_titulo,
+                "categoria": nova_categoria,
+                "prazo": novo_prazo.strftime("%d/%m/%Y"),
+                "status": novo_status,
+                "historico": novo_hist,
+            }
+            # a versão exibida vai junto: se alguém salvou a tarefa nesse meio-tempo, nada é sobrescrito
+            if storage.atualizar_tarefa(tarefa_id, updates, usuario=nome, versao=int(tarefa["versao"])):
                 InterfaceUI.success("✅ Tarefa atualizada com sucesso!")
                 st.rerun()
-        else:
-            InterfaceUI.error("Tarefa não encontrada na planilha.")
+            else:
+                InterfaceUI.error(
+                    "Não foi possível salvar: a tarefa foi alterada por outra pessoa (ou removida). "
+                    "Recarregue a página para ver a versão atual."
+                )
 
 # ------------------------------------------------------------
 # 📜 Logs
 # ------------------------------------------------------------
-elif aba == "Logs":
+def pagina_logs():
     InterfaceUI.section("📜 Histórico de Alterações")
-    try:
-        log_sheet = sheet.spreadsheet.worksheet("Logs")
-        data = log_sheet.get_all_records()
-        if not data:
-            InterfaceUI.info("Nenhum log registrado ainda.")
-        else:
-            df_logs = pd.DataFrame(data)
-            c1, c2, c3 = st.columns([1, 1, 1])
-            with c1:
-                filtro_usuario = st.selectbox("Usuário", ["(todos)"] + sorted(df_logs["usuario"].unique()))
-            with c2:
-                filtro_tarefa = st.text_input("ID da tarefa contém", "")
-            with c3:
-                if st.button("⬇️ Baixar CSV", use_container_width=True):
-                    st.download_button(
-                        label="Baixar agora",
-                        data=df_logs.to_csv(index=False).encode("utf-8"),
-                        file_name="logs_tarefas.csv",
-                        mime="text/csv",
-                        use_container_width=True
-                    )
-
-            if filtro_usuario != "(todos)":
-                df_logs = df_logs[df_logs["usuario"] == filtro_usuario]
-            if filtro_tarefa.strip():
-                df_logs = df_logs[df_logs["id_tarefa"].astype(str).str.contains(filtro_tarefa.strip(), case=False)]
-
-            st.dataframe(df_logs.sort_values("data_hora", ascending=False), use_container_width=True)
-    except Exception:
-        InterfaceUI.warn("A aba 'Logs' ainda não existe. Ela será criada automaticamente na primeira atualização de tarefa.")
+    c1, c2, c3 = st.columns([1, 1, 1])
+    with c1:
+        filtro_usuario = st.selectbox("Usuário", ["(todos)"] + storage.usuarios_nos_logs())
+    with c2:
+        filtro_tarefa = st.text_input("ID da tarefa contém", "")
+
+    # páginas já carregadas (do mais novo para o mais antigo); recomeça ao entrar na aba ou mudar filtros
+    filtros = (filtro_usuario, filtro_tarefa.strip())
+    estado = st.session_state.get("logs_paginas")
+    if estado is None or estado["filtros"] != filtros or mudou_de_aba:
+        estado = st.session_state["logs_paginas"] = {"filtros": filtros, "paginas": [], "cursor": None}
+    if not estado["paginas"]:
+        carregar_pagina_de_logs(estado)
+
+    df_logs = pd.concat(estado["paginas"], ignore_index=True)
+    if df_logs.empty:
+        InterfaceUI.info("Nenhum log registrado ainda.")
+    else:
+        with c3:
+            botao_exportar("logs", "⬇️ Exportar logs (CSV)", "logs_tarefas.csv")
+        st.dataframe(df_logs, use_container_width=True)
+        if estado["cursor"] is not None and st.button("⏬ Carregar mais antigos"):
+            carregar_pagina_de_logs(estado)
+            st.rerun()
+
+# ------------------------------------------------------------
+# Navegação
+# ------------------------------------------------------------
+# cada aba -> função que a renderiza (e faz os imports de que precisa)
+PAGINAS = {
+    "Nova Tarefa": pagina_nova_tarefa,
+    "Minhas Tarefas": pagina_minhas_tarefas,
+    "Kanban": pagina_kanban,
+    "Analytics": pagina_analytics,
+    "AI Insights": pagina_ai_insights,
+    "Atualizar Tarefa": pagina_atualizar_tarefa,
+    "Logs": pagina_logs,
+}
+aba = st.sidebar.radio("📍 Navegação", list(PAGINAS))
+
+mudou_de_aba = st.session_state.get("_aba_anterior") != aba
+st.session_state["_aba_anterior"] = aba
+
+# instrumentação: chamadas à API desta execução (+ as de uma execução interrompida por st.rerun)
+execucao = instrumentacao.iniciar_execucao(aba)
+anterior = st.session_state.get("_api_execucao")
+if anterior is not None and not anterior.exibida:
+    execucao.herdar(anterior)
+st.session_state["_api_execucao"] = execucao
+
+try:
+    PAGINAS[aba]()
+except Exception as e:
+    # cota esgotada, planilha fora do ar...: o erro aparece, não uma página vazia
+    InterfaceUI.error(f"❌ Não foi possível carregar os dados ({type(e).__name__}: {e}). Tente novamente em instantes.")
+    with st.expander("Detalhes do erro"):
+        st.exception(e)
+
+# ------------------------------------------------------------
+# 📡 Painel de chamadas à API
+# ------------------------------------------------------------
+InterfaceUI.painel_api(execucao)
+execucao.exibida = True
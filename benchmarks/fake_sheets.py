@@ -0,0 +1,272 @@
+import re
+import threading
+import time
+from collections import Counter
+
+from gspread.exceptions import WorksheetNotFound
+
+
+def _a1(ref: str):
+    """'C12' -> (12, 3); 'C' -> (None, 3); '12' -> (12, None)."""
+    m = re.fullmatch(r"([A-Za-z]*)(\d*)", ref.strip())
+    letras, numero = m.group(1).upper(), m.group(2)
+    col = 0
+    for ch in letras:
+        col = col * 26 + (ord(ch) - 64)
+    return (int(numero) if numero else None), (col or None)
+
+
+def _coluna(col: int) -> str:
+    letras = ""
+    while col:
+        col, resto = divmod(col - 1, 26)
+        letras = chr(65 + resto) + letras
+    return letras
+
+
+def _aparar(linhas: list) -> list:
+    """Remove células vazias à direita e linhas vazias no fim, como a API faz."""
+    out = []
+    for linha in linhas:
+        while linha and linha[-1] == "":
+            linha = linha[:-1]
+        out.append(linha)
+    while out and not out[-1]:
+        out.pop()
+    return out
+
+
+class FakeAPIError(Exception):
+    """Erro HTTP simulado; `code` é lido por WorksheetClient como o status da resposta."""
+
+    def __init__(self, code: int):
+        super().__init__(f"erro {code} simulado")
+        self.code = code
+
+
+class _Falhas:
+    """Erros programados por chamada: `falhar("append_rows", 503, 429)` faz as duas
+    próximas append_rows falharem com esses códigos, antes de aplicar qualquer coisa."""
+
+    def __init__(self):
+        self._programadas = {}
+        self._lock = threading.Lock()
+
+    def falhar(self, nome: str, *codigos: int):
+        with self._lock:
+            self._programadas.setdefault(nome, []).extend(codigos)
+
+    def verificar(self, nome: str):
+        with self._lock:
+            fila = self._programadas.get(nome)
+            codigo = fila.pop(0) if fila else None
+        if codigo is not None:
+            raise FakeAPIError(codigo)
+
+
+class FakeCell:
+    def __init__(self, row: int, col: int, value: str):
+        self.row, self.col, self.value = row, col, value
+
+
+class FakeWorksheet:
+    """Worksheet em memória com a parte da interface do gspread usada pelo app.
+
+    Cada chamada conta em `chamadas` e espera `latencia` segundos, simulando a rede;
+    `falhar(nome, *codigos)` programa erros HTTP (ex.: 429) para as próximas chamadas.
+    """
+
+    def __init__(self, title: str, linhas: list = None, latencia: float = 0.0, spreadsheet=None, id: int = 0):
+        self.title = title
+        self.id = id
+        self.linhas = [[str(v) for v in l] for l in (linhas or [])]
+        self.latencia = latencia
+        self.spreadsheet = spreadsheet
+        self.chamadas = Counter()
+        self._lock = threading.Lock()
+        self._falhas = _Falhas()
+        self.falhar = self._falhas.falhar
+
+    def _api(self, nome: str):
+        self.chamadas[nome] += 1
+        if self.latencia:
+            time.sleep(self.latencia)
+        self._falhas.verificar(nome)
+
+    def _celula(self, row: int, col: int) -> str:
+        if row - 1 < len(self.linhas) and col - 1 < len(self.linhas[row - 1]):
+            return self.linhas[row - 1][col - 1]
+        return ""
+
+    def _escrever(self, row: int, col: int, value):
+        while len(self.linhas) < row:
+            self.linhas.append([])
+        linha = self.linhas[row - 1]
+        if len(linha) < col:
+            linha.extend([""] * (col - len(linha)))
+        linha[col - 1] = "" if value is None else str(value)
+
+    def _ler(self, faixa: str) -> list:
+        faixa = faixa.split("!")[-1]
+        inicio, _, fim = faixa.partition(":")
+        r1, c1 = _a1(inicio)
+        r2, c2 = _a1(fim) if fim else (r1, c1)
+        r1, c1 = r1 or 1, c1 or 1
+        r2 = r2 or len(self.linhas)
+        c2 = c2 or max((len(l) for l in self.linhas), default=0)
+        return _aparar([[self._celula(r, c) for c in range(c1, c2 + 1)] for r in range(r1, r2 + 1)])
+
+    # -----------------------------
+    # Leituras
+    # -----------------------------
+    def get_all_values(self):
+        self._api("get_all_values")
+        with self._lock:
+            return [list(l) for l in self.linhas]
+
+    def get_all_records(self):
+        self._api("get_all_records")
+        with self._lock:
+            if not self.linhas:
+                return []
+            headers = self.linhas[0]
+            return [dict(zip(headers, l + [""] * (len(headers) - len(l)))) for l in self.linhas[1:]]
+
+    def row_values(self, row: int):
+        self._api("row_values")
+        with self._lock:
+            return _aparar([list(self.linhas[row - 1])])[0] if row <= len(self.linhas) else []
+
+    def col_values(self, col: int):
+        self._api("col_values")
+        with self._lock:
+            valores = [self._celula(r, col) for r in range(1, len(self.linhas) + 1)]
+        while valores and valores[-1] == "":
+            valores.pop()
+        return valores
+
+    def cell(self, row: int, col: int):
+        self._api("cell")
+        with self._lock:
+            return FakeCell(row, col, self._celula(row, col))
+
+    def get(self, range_name: str = None, **kwargs):
+        self._api("get")
+        with self._lock:
+            return self._ler(range_name or "A1:")
+
+    def batch_get(self, ranges: list, **kwargs):
+        self._api("batch_get")
+        with self._lock:
+            return [self._ler(r) for r in ranges]
+
+    # -----------------------------
+    # Escritas
+    # -----------------------------
+    def update_cell(self, row: int, col: int, value):
+        self._api("update_cell")
+        with self._lock:
+            self._escrever(row, col, value)
+
+    def update(self, range_name: str = None, values: list = None, **kwargs):
+        self._api("update")
+        with self._lock:
+            self._escrever_faixa(range_name, values)
+
+    def batch_update(self, data: list, **kwargs):
+        self._api("batch_update")
+        with self._lock:
+            for item in data:
+                self._escrever_faixa(item["range"], item["values"])
+
+    def _escrever_faixa(self, faixa: str, valores: list):
+        r1, c1 = _a1(faixa.split("!")[-1].split(":")[0])
+        for i, linha in enumerate(valores):
+            for j, v in enumerate(linha):
+                self._escrever(r1 + i, c1 + j, v)
+
+    def append_row(self, values: list, **kwargs):
+        return self.append_rows([values], _nome="append_row")
+
+    def append_rows(self, values: list, _nome: str = "append_rows", **kwargs):
+        self._api(_nome)
+        with self._lock:
+            inicio = len(_aparar(self.linhas)) + 1
+            del self.linhas[inicio - 1:]
+            self.linhas.extend([str(v) for v in l] for l in values)
+            fim = len(self.linhas)
+        largura = max((len(l) for l in values), default=1)
+        faixa = f"{self.title}!A{inicio}:{_coluna(largura)}{fim}"
+        return {"updates": {"updatedRange": faixa, "updatedRows": len(values)}}
+
+
+class FakeSpreadsheet:
+    def __init__(self, latencia: float = 0.0):
+        self.latencia = latencia
+        self.abas = {}
+        self._chamadas = Counter()  # chamadas no nível da planilha (spreadsheets.batchUpdate)
+        self._falhas = _Falhas()
+        self.falhar = self._falhas.falhar  # ex.: planilha.falhar("batch_update", 429)
+
+    @property
+    def sheet1(self):
+        return next(iter(self.abas.values()))
+
+    def criar(self, title: str, linhas: list) -> FakeWorksheet:
+        aba = FakeWorksheet(title, linhas, self.latencia, spreadsheet=self, id=len(self.abas))
+        self.abas[title] = aba
+        return aba
+
+    def worksheet(self, title: str):
+        if self.latencia:
+            time.sleep(self.latencia)
+        if title not in self.abas:
+            raise WorksheetNotFound(title)
+        return self.abas[title]
+
+    def worksheets(self):
+        return list(self.abas.values())
+
+    def add_worksheet(self, title: str, rows=None, cols=None, **kwargs):
+        if self.latencia:
+            time.sleep(self.latencia)
+        return self.criar(title, [])
+
+    def batch_update(self, body: dict):
+        """spreadsheets.batchUpdate; só `findReplace` restrito a uma faixa (matchEntireCell)."""
+        self._chamadas["batch_update (planilha)"] += 1
+        if self.latencia:
+            time.sleep(self.latencia)
+        self._falhas.verificar("batch_update")
+        abas = {a.id: a for a in self.abas.values()}
+        respostas = []
+        for pedido in body.get("requests", []):
+            busca = pedido["findReplace"]
+            faixa = busca["range"]
+            aba = abas[faixa["sheetId"]]
+            trocas = 0
+            with aba._lock:
+                for r in range(faixa["startRowIndex"] + 1, faixa["endRowIndex"] + 1):
+                    for c in range(faixa["startColumnIndex"] + 1, faixa["endColumnIndex"] + 1):
+                        if aba._celula(r, c) == busca["find"]:
+                            aba._escrever(r, c, busca["replacement"])
+                            trocas += 1
+            # como a API, omite os contadores quando nada foi trocado
+            respostas.append({"findReplace": {"valuesChanged": trocas, "occurrencesChanged": trocas} if trocas else {}})
+        return {"replies": respostas}
+
+    def chamadas(self) -> Counter:
+        total = Counter(self._chamadas)
+        for aba in self.abas.values():
+            total.update(aba.chamadas)
+        return total
+
+
+class FakeClient:
+    """Substitui o cliente gspread: `GoogleSheetsService(..., cliente=FakeClient(planilha))`."""
+
+    def __init__(self, planilha: FakeSpreadsheet):
+        self.planilha = planilha
+
+    def open_by_key(self, key: str) -> FakeSpreadsheet:
+        return self.planilha
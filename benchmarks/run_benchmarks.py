@@ -0,0 +1,187 @@
+"""Benchmarks de I/O do app contra uma planilha falsa em memória.
+
+Roda os caminhos reais (GoogleSheetsService, Dashboard, AIInsights, KanbanBoard.render_otimista)
+trocando apenas o cliente gspread por `benchmarks.fake_sheets.FakeClient`, e
+reporta chamadas à API, tempo de parede e pico de memória de cada operação.
+
+Uso:
+    python -m benchmarks.run_benchmarks --tamanhos 1000 10000 100000 --latencia 0.05
+"""
+import argparse
+import json
+import random
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.fake_sheets import FakeClient, FakeSpreadsheet
+from models.ai_insights import AIInsights
+from models.dashboard import Dashboard
+from services.google_sheets_service import GoogleSheetsService
+from services.gravacoes import GravacoesOrdenadas
+
+COLUNAS_KANBAN = ["id", "titulo", "categoria", "prazo", "status", "autor"]  # as mesmas do app.py
+AUTORES = [f"Usuário {i}" for i in range(20)]
+CATEGORIAS = ["Pessoal", "Trabalho", "Estudo", "Outro"]
+STATUS = ["Pendente", "Em andamento", "Concluída"]
+PALAVRAS = ("reunião cliente revisar entrega ótimo atraso bloqueado concluído relatório "
+            "ajuste prazo urgente bom ruim ideia testar código análise planilha").split()
+
+
+def semear(n: int, latencia: float = 0.0, palavras_historico: int = 120, seed: int = 42) -> FakeSpreadsheet:
+    """Planilha com `n` tarefas, ~3 logs por tarefa e históricos longos."""
+    rnd = random.Random(seed)
+    base = datetime(2024, 1, 1)
+    planilha = FakeSpreadsheet(latencia)
+    linhas = [GoogleSheetsService.COLUNAS]
+    logs = [["data_hora", "usuario", "id_tarefa", "campo", "valor_antigo", "valor_novo"]]
+    for i in range(n):
+        criada = base + timedelta(minutes=rnd.randrange(0, 60 * 24 * 600))
+        atualizada = criada + timedelta(minutes=rnd.randrange(0, 60 * 24 * 60))
+        autor = rnd.choice(AUTORES)
+        task_id = f"t{i:07d}"
+        notas = [
+            f"[{atualizada:%d/%m/%Y %H:%M}] {autor}: " + " ".join(rnd.choices(PALAVRAS, k=12))
+            for _ in range(max(1, palavras_historico // 12))
+        ]
+        linhas.append([
+            task_id, f"{criada:%d/%m/%Y %H:%M}", " ".join(rnd.choices(PALAVRAS, k=4)).capitalize(),
+            rnd.choice(CATEGORIAS), f"{criada + timedelta(days=rnd.randrange(1, 60)):%d/%m/%Y}",
+            rnd.choice(STATUS), "\n".join(notas), f"{atualizada:%d/%m/%Y %H:%M}", autor, f"{task_id}:1",
+        ])
+        for campo in ("criação", "status", "ultima_atualizacao"):
+            logs.append([f"{atualizada:%d/%m/%Y %H:%M:%S}", autor, task_id, campo, "", rnd.choice(STATUS)])
+    planilha.criar("Tarefas", linhas)
+    planilha.criar("Logs", logs)
+    return planilha
+
+
+def novo_servico(planilha: FakeSpreadsheet) -> GoogleSheetsService:
+    # cota "infinita": o benchmark mede o custo de I/O, não a espera do limitador
+    return GoogleSheetsService("benchmark", cota_por_minuto=10 ** 9, cliente=FakeClient(planilha))
+
+
+def medir(nome: str, planilha: FakeSpreadsheet, func, memoria: bool = True) -> dict:
+    antes = planilha.chamadas()
+    if memoria:
+        tracemalloc.start()
+    inicio = time.perf_counter()
+    func()
+    duracao = time.perf_counter() - inicio
+    pico = 0
+    if memoria:
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    chamadas = planilha.chamadas() - antes
+    return {
+        "operacao": nome,
+        "chamadas": sum(chamadas.values()),
+        "detalhe": dict(chamadas),
+        "tempo_s": round(duracao, 4),
+        "pico_mb": round(pico / 2 ** 20, 2),
+    }
+
+
+def _quadro_kanban(df, executor):
+    """Script do AppTest (o corpo roda isolado, por isso o import aqui dentro)."""
+    from models.kanban_board import KanbanBoard
+
+    KanbanBoard(df).render_otimista(on_move=lambda *a: True, executor=executor, on_move_lote=lambda ids, *a: ids)
+
+
+def cenarios(n: int, latencia: float, memoria: bool = True) -> list:
+    planilha = semear(n, latencia)
+    resultados = []
+
+    def rodar(nome, func):
+        resultados.append(dict(medir(nome, planilha, func, memoria), linhas=n))
+
+    svc = novo_servico(planilha)
+    rodar("carregar_tarefas (frio)", lambda: svc.carregar_tarefas())
+    rodar("carregar_tarefas (cache quente)", lambda: svc.carregar_tarefas())
+    svc_kanban = novo_servico(planilha)
+    rodar("carregar_tarefas colunas Kanban (frio)", lambda: svc_kanban.carregar_tarefas(columns=COLUNAS_KANBAN))
+
+    alvo = f"t{n // 2:07d}"
+
+    def atualizar():
+        svc.atualizar_tarefa(alvo, {"status": "Concluída", "titulo": "Revisado"}, usuario="bench")
+        svc.logs.flush()
+
+    def nota():
+        svc.adicionar_nota(alvo, usuario="bench", nota="nota de benchmark", acao="[Kanban]")
+        svc.logs.flush()
+
+    rodar("atualizar_tarefa (cache quente)", atualizar)
+    rodar("append_note_to_history", nota)
+    # outra instância grava a mesma tarefa: a versão no cache de `svc` fica velha e a
+    # gravação seguinte relê só essa linha antes de repetir o compare-and-set
+    outro = novo_servico(planilha)
+    outro.atualizar_tarefa(alvo, {"categoria": "Estudo"}, usuario="outro")
+    outro.logs.fechar()
+    rodar("atualizar_tarefa (conflito de versão)", atualizar)
+    rodar("carregar_tarefas (delta após escritas)", lambda: svc.carregar_tarefas())
+
+    rodar("carregar_tarefas de um autor (cache quente)", lambda: svc.carregar_tarefas(autor=AUTORES[0]))
+    df_autor = svc.carregar_tarefas(autor=AUTORES[0])
+
+    def dashboard():
+        dash = Dashboard(df_autor)
+        dash.kpi_cards()
+        dash.grafico_evolucao()
+        dash.grafico_categoria()
+        dash.grafico_status()
+
+    def insights():
+        ai = AIInsights(df_autor)
+        ai.sentimento_historico()
+        ai.recomendacoes()
+
+    rodar("Dashboard", dashboard)
+    rodar("AIInsights", insights)
+    # os fragmentos só rodam com uma sessão do Streamlit: o quadro roda no AppTest
+    executor = GravacoesOrdenadas(ThreadPoolExecutor(max_workers=1))
+    app = AppTest.from_function(_quadro_kanban, args=(df_autor[COLUNAS_KANBAN], executor), default_timeout=600)
+    rodar("KanbanBoard.render_otimista", app.run)
+    botao = next(b for b in app.button if b.key and b.key.startswith("mv_"))
+    rodar("KanbanBoard mover um card", lambda: botao.click().run())
+    executor._executor.shutdown()
+    svc.logs.fechar()
+    svc_kanban.logs.fechar()
+    return resultados
+
+
+def imprimir(resultados: list):
+    print(f"{'linhas':>8}  {'operação':<42} {'chamadas':>8} {'tempo (s)':>10} {'pico (MB)':>10}")
+    for r in resultados:
+        print(f"{r['linhas']:>8}  {r['operacao']:<42} {r['chamadas']:>8} {r['tempo_s']:>10.4f} {r['pico_mb']:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de I/O com planilha falsa em memória.")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--latencia", type=float, default=0.0, help="latência simulada por chamada (s)")
+    parser.add_argument("--sem-memoria", action="store_true", help="não mede pico de memória (tracemalloc é lento)")
+    parser.add_argument("--json", help="grava os resultados neste arquivo")
+    args = parser.parse_args()
+
+    try:
+        from streamlit.logger import set_log_level
+        set_log_level("error")  # fora do `streamlit run` os widgets só emitem avisos
+    except ImportError:
+        pass
+
+    resultados = []
+    for n in args.tamanhos:
+        resultados += cenarios(n, args.latencia, memoria=not args.sem_memoria)
+    imprimir(resultados)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Tempo de inicialização do app: do processo novo até o formulário de login.
+
+Cada repetição roda num interpretador Python novo (cold start): importa o
+streamlit, executa o app.py com `streamlit.testing.v1.AppTest` até o formulário
+de login aparecer e informa quais dependências pesadas já estavam carregadas.
+
+Uso:
+    python -m benchmarks.startup --repeticoes 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PESADOS = ["pandas", "plotly", "textblob", "gspread", "google.oauth2"]
+
+# executado em cada processo filho; imprime uma linha JSON
+_FILHO = """
+import json, sys, time
+inicio = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+streamlit_s = time.perf_counter() - inicio
+at = AppTest.from_file({app!r}, default_timeout=120)
+at.secrets["credentials"] = {{"usernames": {{}}}}
+at.run()
+total_s = time.perf_counter() - inicio
+print(json.dumps({{
+    "streamlit_s": streamlit_s,
+    "total_s": total_s,
+    "login": any(t.label == "Usuário" for t in at.text_input),
+    "erro": str(at.exception[0].message) if at.exception else "",
+    "modulos": {{m: m in sys.modules for m in {pesados!r}}},
+}}))
+"""
+
+
+def medir_uma_vez() -> dict:
+    codigo = _FILHO.format(app=os.path.join(RAIZ, "app.py"), pesados=PESADOS)
+    saida = subprocess.run(
+        [sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(saida.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo até o formulário de login (cold start).")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--json", help="grava os resultados neste arquivo")
+    args = parser.parse_args()
+
+    medidas = [medir_uma_vez() for _ in range(args.repeticoes)]
+    erros = [m["erro"] for m in medidas if m["erro"] or not m["login"]]
+    if erros:
+        sys.exit(f"o formulário de login não foi renderizado: {erros[0] or 'sem campo Usuário'}")
+
+    totais = [m["total_s"] for m in medidas]
+    app = [m["total_s"] - m["streamlit_s"] for m in medidas]
+    print(f"{'repetições':<28} {len(medidas)}")
+    print(f"{'tempo até login (mediana)':<28} {statistics.median(totais):.3f} s")
+    print(f"{'  só o app.py (mediana)':<28} {statistics.median(app):.3f} s")
+    print(f"{'tempo até login (mín/máx)':<28} {min(totais):.3f} / {max(totais):.3f} s")
+    for modulo in PESADOS:
+        print(f"{'  ' + modulo + ' carregado':<28} {'sim' if medidas[0]['modulos'][modulo] else 'não'}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(medidas, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
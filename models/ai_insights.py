@@ -1,16 +1,18 @@
-from textblob import TextBlob
 import pandas as pd
 import streamlit as st
 
+from models.sentimento import MotorSentimento
+
 class AIInsights:
-    def __init__(self, df: pd.DataFrame):
+    def __init__(self, df: pd.DataFrame, motor: MotorSentimento = None):
         self.df = df.copy()
+        self.motor = motor or MotorSentimento()
 
     def sentimento_historico(self):
         if "historico" not in self.df.columns or self.df["historico"].isna().all():
             st.info("Nenhum histórico disponível para análise.")
             return
-        self.df["sentimento"] = self.df["historico"].astype(str).apply(lambda x: TextBlob(x).sentiment.polarity)
+        self.df["sentimento"] = self.motor.pontuar(self.df["historico"].astype(str).tolist())
         media = self.df["sentimento"].mean()
         status = "😊 Positivo" if media > 0.2 else "😐 Neutro" if media > -0.2 else "😞 Negativo"
         st.metric("Humor geral das tarefas", status, f"{media:.2f}")
@@ -0,0 +1,91 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+
+class AnaliseCiclo:
+    """Tempo de ciclo e permanência por status reconstruídos a partir dos Logs.
+
+    Os logs são lidos em blocos (`storage.iterar_logs`) a partir da última
+    posição processada; só o estado por tarefa fica em memória e é persistido
+    em `caminho` (JSON), então cada visita processa apenas os logs novos.
+    """
+
+    FORMATO_LOG = "%d/%m/%Y %H:%M:%S"
+
+    def __init__(self, caminho: str = "ciclo_cache.json", bloco: int = 5000):
+        self.caminho = caminho
+        self.bloco = bloco
+        self._lock = threading.Lock()
+        self.posicao = 0
+        # id -> {"criada", "status", "desde", "permanencia": {status: segundos}, "ciclos": [[semana, dias], ...]}
+        self.tarefas = {}
+        if os.path.exists(caminho):
+            with open(caminho, encoding="utf-8") as f:
+                estado = json.load(f)
+            self.posicao = estado["posicao"]
+            self.tarefas = estado["tarefas"]
+
+    def _salvar(self):
+        tmp = f"{self.caminho}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"posicao": self.posicao, "tarefas": self.tarefas}, f, ensure_ascii=False)
+        os.replace(tmp, self.caminho)
+
+    def _aplicar(self, linha: list):
+        data_hora, _, id_tarefa, campo, antigo, novo = linha[:6]
+        if campo not in ("criação", "status") or not id_tarefa:
+            return
+        try:
+            ts = datetime.strptime(data_hora, self.FORMATO_LOG).timestamp()
+        except ValueError:
+            return
+        tarefa = self.tarefas.setdefault(
+            id_tarefa, {"criada": None, "status": None, "desde": None, "permanencia": {}, "ciclos": []}
+        )
+        if campo == "criação":
+            tarefa.update(criada=ts, status="Pendente", desde=ts)
+            return
+        # transição de status: fecha a permanência no status anterior
+        anterior = antigo or tarefa["status"] or "Pendente"
+        if tarefa["desde"] is not None and ts >= tarefa["desde"]:
+            tarefa["permanencia"][anterior] = tarefa["permanencia"].get(anterior, 0) + (ts - tarefa["desde"])
+        tarefa.update(status=novo, desde=ts)
+        if novo == "Concluída" and tarefa["criada"] is not None:
+            semana = datetime.fromtimestamp(ts).strftime("%G-W%V")
+            tarefa["ciclos"].append([semana, (ts - tarefa["criada"]) / 86400])
+
+    def atualizar(self, storage) -> int:
+        """Processa os logs novos; retorna quantas linhas foram lidas."""
+        with self._lock:
+            lidas = 0
+            for linhas in storage.iterar_logs(self.posicao, self.bloco):
+                for linha in linhas:
+                    self._aplicar(linha)
+                self.posicao += len(linhas)
+                lidas += len(linhas)
+            if lidas:
+                self._salvar()
+            return lidas
+
+    def resumo(self, ids=None) -> dict:
+        """DataFrames de ciclos (dias), permanência média por status (dias) e vazão semanal."""
+        ids = set(ids) if ids is not None else None
+        with self._lock:
+            tarefas = {i: t for i, t in self.tarefas.items() if ids is None or i in ids}
+            ciclos = pd.DataFrame(
+                [(i, s, d) for i, t in tarefas.items() for s, d in t["ciclos"]],
+                columns=["id", "semana", "dias"]
+            )
+            permanencia = pd.DataFrame(
+                [(i, s, seg / 86400) for i, t in tarefas.items() for s, seg in t["permanencia"].items()],
+                columns=["id", "status", "dias"]
+            )
+        return {
+            "ciclos": ciclos,
+            "permanencia": permanencia.groupby("status")["dias"].mean().reset_index(),
+            "vazao": ciclos.groupby("semana").size().reset_index(name="concluidas"),
+        }
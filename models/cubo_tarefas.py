@@ -0,0 +1,78 @@
+import threading
+
+import pandas as pd
+
+from models.tarefa import normalizar_autor, tipar
+
+
+class CuboTarefas:
+    """Agregado compacto das tarefas por autor × status × categoria × mês de criação.
+
+    Cada célula guarda a contagem de tarefas. `atualizar` compara uma assinatura
+    por tarefa (só os campos das chaves) com a da carga anterior e só reprocessa
+    (e re-agrega) as tarefas novas, removidas ou que mudaram de célula; editar
+    outros campos não custa nada aqui.
+    """
+
+    CHAVES = ["autor", "status", "categoria", "mes"]
+    COLUNAS_ASSINATURA = ["autor", "status", "categoria", "data_criacao"]
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # contribuição de cada tarefa (índice = id)
+        self._por_tarefa = pd.DataFrame(columns=self.CHAVES + ["assinatura"])
+        self._cubo = pd.DataFrame(columns=["n"],
+                                  index=pd.MultiIndex.from_tuples([], names=self.CHAVES))
+
+    @classmethod
+    def _contribuicoes(cls, df: pd.DataFrame) -> pd.DataFrame:
+        df = tipar(df)  # no-op para o que já veio tipado do storage
+        criacao = df["data_criacao_dt"]
+        # chaves como texto: groupby em categóricas geraria o produto de todas as categorias
+        return pd.DataFrame({
+            "autor": df["autor_norm"].astype(str),
+            "status": df["status"].astype(str),
+            "categoria": df["categoria"].astype(str),
+            "mes": criacao.dt.strftime("%Y-%m").fillna(""),
+        }, index=df.index)
+
+    @classmethod
+    def _agregar(cls, contrib: pd.DataFrame, sinal: int = 1) -> pd.DataFrame:
+        return contrib.assign(n=1).groupby(cls.CHAVES, dropna=False)[["n"]].sum() * sinal
+
+    def atualizar(self, df: pd.DataFrame, autor: str = None):
+        """Incorpora o estado atual das tarefas (colunas id + COLUNAS_ASSINATURA, tipadas ou não).
+
+        Com `autor`, `df` traz só as tarefas dele: as dos demais autores ficam como estão.
+        """
+        df = df[df["id"].astype(str) != ""].drop_duplicates("id", keep="last").set_index("id")
+        assinatura = df[self.COLUNAS_ASSINATURA[0]].astype(str)
+        for c in self.COLUNAS_ASSINATURA[1:]:
+            assinatura = assinatura + "\x1f" + df[c].astype(str)
+        with self._lock:
+            anterior = self._por_tarefa["assinatura"].reindex(df.index)
+            mudou = assinatura.index[assinatura.ne(anterior)]
+            conhecidas = self._por_tarefa.index
+            if autor is not None:
+                conhecidas = conhecidas[self._por_tarefa["autor"] == normalizar_autor(autor)]
+            removidas = conhecidas.difference(df.index)
+            saindo = self._por_tarefa.index.intersection(mudou).union(removidas)
+            if len(mudou) == 0 and len(saindo) == 0:
+                return
+
+            novas = self._contribuicoes(df.loc[mudou]).assign(assinatura=assinatura.loc[mudou])
+            delta = self._agregar(novas)
+            if len(saindo):
+                delta = delta.add(self._agregar(self._por_tarefa.loc[saindo], sinal=-1), fill_value=0)
+
+            cubo = self._cubo.add(delta, fill_value=0) if len(self._cubo) else delta
+            self._cubo = cubo[cubo["n"] > 0]
+            self._por_tarefa = pd.concat([self._por_tarefa.drop(index=saindo), novas])
+
+    def recorte(self, autor: str = None) -> pd.DataFrame:
+        """Células do cubo (de um autor, se informado) como DataFrame plano."""
+        with self._lock:
+            cubo = self._cubo.reset_index()
+        if autor is not None:
+            cubo = cubo[cubo["autor"] == normalizar_autor(autor)]
+        return cubo
@@ -2,58 +2,65 @@ import streamlit as st
 import plotly.express as px
 import pandas as pd
 
+from models.cubo_tarefas import CuboTarefas
+
 class Dashboard:
-    def __init__(self, df):
-        self.df = df.copy()
-        self.preprocess()
+    def __init__(self, df: pd.DataFrame = None, cubo: CuboTarefas = None, autor: str = None):
+        # sem cubo compartilhado, agrega o próprio df (já filtrado)
+        if cubo is None:
+            cubo = CuboTarefas()
+            cubo.atualizar(df)
+        self.cubo = cubo.recorte(autor)
 
-    def preprocess(self):
-        for col in ["data_criacao", "prazo", "ultima_atualizacao"]:
-            if col in self.df.columns:
-                self.df[col] = pd.to_datetime(self.df[col], errors="coerce", dayfirst=True)
-        self.df["status"] = self.df["status"].fillna("Pendente")
+    def _contagem(self, chave: str) -> pd.Series:
+        return self.cubo.groupby(chave)["n"].sum().astype(int).sort_values(ascending=False)
 
     def kpi_cards(self):
-        total = len(self.df)
-        concluidas = (self.df["status"] == "Concluída").sum()
-        andamento = (self.df["status"] == "Em andamento").sum()
-        pendentes = (self.df["status"] == "Pendente").sum()
+        por_status = self._contagem("status")
+        total = int(por_status.sum())
+        concluidas = int(por_status.get("Concluída", 0))
+        andamento = int(por_status.get("Em andamento", 0))
+        pendentes = int(por_status.get("Pendente", 0))
 
         c1, c2, c3 = st.columns(3)
         c1.metric("✅ Concluídas", concluidas, f"{(concluidas/total*100):.1f}%" if total else "0%")
         c2.metric("⏳ Em andamento", andamento)
         c3.metric("🕒 Pendentes", pendentes)
 
-    def tempo_medio_conclusao(self):
-        df = self.df.copy()
-        df = df[(df["status"] == "Concluída") & df["data_criacao"].notna() & df["ultima_atualizacao"].notna()]
-        if df.empty:
-            st.info("Nenhuma tarefa concluída ainda para calcular tempo médio.")
-            return
-        df["duracao_dias"] = (df["ultima_atualizacao"] - df["data_criacao"]).dt.days
-        media = df["duracao_dias"].mean()
-        st.metric("⏱️ Tempo médio de conclusão", f"{media:.1f} dias")
-
     def grafico_evolucao(self):
-        df = self.df.copy()
-        if df["data_criacao"].isna().all():
+        df = self.cubo[self.cubo["mes"] != ""]
+        if df.empty:
             st.warning("Sem dados de data para gerar gráfico temporal.")
             return
-        df["mês"] = df["data_criacao"].dt.to_period("M").astype(str)
-        evolucao = df.groupby("mês")["id"].count().reset_index(name="tarefas")
+        evolucao = df.groupby("mes")["n"].sum().astype(int).reset_index(name="tarefas").rename(columns={"mes": "mês"})
         fig = px.line(evolucao, x="mês", y="tarefas", title="📈 Tarefas criadas por mês", markers=True)
         st.plotly_chart(fig, use_container_width=True)
 
     def grafico_categoria(self):
-        if "categoria" in self.df.columns:
-            categoria_counts = self.df["categoria"].value_counts().reset_index()
-            categoria_counts.columns = ["Categoria", "Quantidade"]
-            fig = px.bar(categoria_counts, x="Categoria", y="Quantidade", title="📊 Distribuição por Categoria", color="Categoria")
-            st.plotly_chart(fig, use_container_width=True)
+        categoria_counts = self._contagem("categoria").reset_index()
+        categoria_counts.columns = ["Categoria", "Quantidade"]
+        fig = px.bar(categoria_counts, x="Categoria", y="Quantidade", title="📊 Distribuição por Categoria", color="Categoria")
+        st.plotly_chart(fig, use_container_width=True)
 
     def grafico_status(self):
-        if "status" in self.df.columns:
-            status_counts = self.df["status"].value_counts().reset_index()
-            status_counts.columns = ["Status", "Quantidade"]
-            fig = px.pie(status_counts, names="Status", values="Quantidade", title="📍 Distribuição por Status", color="Status")
+        status_counts = self._contagem("status").reset_index()
+        status_counts.columns = ["Status", "Quantidade"]
+        fig = px.pie(status_counts, names="Status", values="Quantidade", title="📍 Distribuição por Status", color="Status")
+        st.plotly_chart(fig, use_container_width=True)
+
+    def tempo_de_ciclo(self, resumo: dict):
+        """Distribuição do ciclo, permanência por status e vazão, a partir de AnaliseCiclo.resumo."""
+        ciclos = resumo["ciclos"]
+        if ciclos.empty:
+            st.info("Nenhuma conclusão registrada nos logs ainda.")
+            return
+        c1, c2 = st.columns(2)
+        c1.metric("⏱️ Tempo de ciclo mediano", f"{ciclos['dias'].median():.1f} dias")
+        c2.metric("📦 Conclusões registradas", len(ciclos))
+        fig = px.histogram(ciclos, x="dias", nbins=30, title="⏱️ Distribuição do tempo de ciclo (dias)")
+        st.plotly_chart(fig, use_container_width=True)
+        if not resumo["permanencia"].empty:
+            fig = px.bar(resumo["permanencia"], x="status", y="dias", color="status", title="⏳ Permanência média por status (dias)")
             st.plotly_chart(fig, use_container_width=True)
+        fig = px.line(resumo["vazao"], x="semana", y="concluidas", title="🚚 Tarefas concluídas por semana", markers=True)
+        st.plotly_chart(fig, use_container_width=True)
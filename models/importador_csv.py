@@ -0,0 +1,65 @@
+import csv
+import io
+
+from models.tarefa import Tarefa, proxima_versao
+
+
+class ImportadorCSV:
+    """Lê um CSV de tarefas (colunas titulo, categoria, prazo e, opcional, historico)
+    validando cada linha com `Tarefa.validar`.
+
+    O arquivo é percorrido linha a linha; as tarefas válidas saem em blocos de
+    `bloco` para serem gravadas com um único append por bloco. Os ids gerados não
+    repetem os da importação nem os de `existentes` (ids já gravados).
+    """
+
+    OBRIGATORIAS = ["titulo", "categoria", "prazo"]
+
+    def __init__(self, arquivo, bloco: int = 500, max_erros: int = 50, existentes=()):
+        self.texto = io.TextIOWrapper(arquivo, encoding="utf-8-sig", newline="")
+        self.bloco = bloco
+        self.max_erros = max_erros
+        self.existentes = existentes
+        self.erros = []  # só as primeiras `max_erros` mensagens
+        self.lidas = 0
+        self.invalidas = 0
+
+    def _leitor(self):
+        texto = self.texto
+        texto.seek(0)
+        amostra = texto.read(4096)
+        texto.seek(0)
+        try:
+            dialeto = csv.Sniffer().sniff(amostra, delimiters=",;")
+        except csv.Error:
+            dialeto = csv.excel
+        leitor = csv.DictReader(texto, dialect=dialeto)
+        leitor.fieldnames = [c.strip().lower() for c in (leitor.fieldnames or [])]
+        return leitor
+
+    def validar_colunas(self) -> list:
+        """Colunas obrigatórias ausentes no cabeçalho."""
+        colunas = self._leitor().fieldnames
+        return [c for c in self.OBRIGATORIAS if c not in colunas]
+
+    def blocos(self):
+        """Gera listas de (Tarefa, historico) válidas; erros ficam em `self.erros`."""
+        lote, ids = [], set(self.existentes)
+        for n, registro in enumerate(self._leitor(), start=2):  # linha 1 é o cabeçalho
+            self.lidas += 1
+            tarefa, erro = Tarefa.validar(registro.get("titulo"), registro.get("categoria"), registro.get("prazo"))
+            if erro:
+                self.invalidas += 1
+                if len(self.erros) < self.max_erros:
+                    self.erros.append(f"Linha {n}: {erro}")
+                continue
+            while tarefa.id in ids:  # ids curtos: colisões são prováveis em planilhas grandes
+                tarefa.id = Tarefa(tarefa.titulo, tarefa.categoria, tarefa.prazo).id
+                tarefa.versao = proxima_versao("", tarefa.id)
+            ids.add(tarefa.id)
+            lote.append((tarefa, (registro.get("historico") or "").strip()))
+            if len(lote) >= self.bloco:
+                yield lote
+                lote = []
+        if lote:
+            yield lote
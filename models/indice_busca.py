@@ -0,0 +1,166 @@
+import bisect
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+
+def dobrar(texto) -> str:
+    """Minúsculas sem acentos: 'Reunião' -> 'reuniao'."""
+    decomposto = unicodedata.normalize("NFKD", str(texto or "").lower())
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+
+class IndiceBusca:
+    """Índice invertido em memória sobre os campos de texto das tarefas.
+
+    Cada tarefa guarda os termos de cada campo (`titulo`, `historico`, `notas`);
+    o peso de um termo na tarefa é a soma das ocorrências ponderada por `PESOS`.
+    Alterar um campo só reindexa aquela tarefa, e notas novas são acrescentadas
+    sem retokenizar o histórico. O ranking é BM25 e um termo terminado em `*`
+    (ou o último termo da consulta, com pelo menos PREFIXO_MINIMO letras) casa
+    por prefixo.
+    """
+
+    PESOS = {"titulo": 3.0, "historico": 1.0, "notas": 1.0}
+    K1, B = 1.2, 0.75
+    PREFIXO_MINIMO = 3  # termos mais curtos só casam inteiros, mesmo na posição de prefixo
+    MAX_EXPANSOES = 50  # um prefixo com mais termos usa só os presentes em mais tarefas
+    _TOKEN = re.compile(r"\w+")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._campos = {}  # id -> {campo: Counter}
+        self._pesos = {}  # id -> {termo: peso}
+        self._tamanhos = {}  # id -> soma dos pesos
+        self._postings = {}  # termo -> {id: peso}
+        self._vocabulario = []  # termos em ordem, para buscas por prefixo
+        self._total = 0.0
+
+    @classmethod
+    def termos(cls, texto) -> list:
+        return [t for t in cls._TOKEN.findall(dobrar(texto)) if len(t) > 1]
+
+    def __contains__(self, doc_id) -> bool:
+        return doc_id in self._campos
+
+    def __len__(self) -> int:
+        return len(self._campos)
+
+    # -----------------------------
+    # Atualização incremental
+    # -----------------------------
+    def _reindexar(self, doc_id):
+        """Troca as postings de `doc_id` pelas calculadas a partir dos campos atuais."""
+        novos = Counter()
+        for campo, contagem in self._campos.get(doc_id, {}).items():
+            peso = self.PESOS.get(campo, 1.0)
+            for termo, n in contagem.items():
+                novos[termo] += n * peso
+        antigos = self._pesos.pop(doc_id, {})
+        for termo in antigos.keys() - novos.keys():
+            docs = self._postings[termo]
+            del docs[doc_id]
+            if not docs:
+                del self._postings[termo]
+                i = bisect.bisect_left(self._vocabulario, termo)
+                del self._vocabulario[i]
+        for termo, peso in novos.items():
+            docs = self._postings.get(termo)
+            if docs is None:
+                docs = self._postings[termo] = {}
+                bisect.insort(self._vocabulario, termo)
+            docs[doc_id] = peso
+        self._total += sum(novos.values()) - self._tamanhos.pop(doc_id, 0.0)
+        if novos:
+            self._pesos[doc_id] = dict(novos)
+            self._tamanhos[doc_id] = sum(novos.values())
+
+    def atualizar(self, doc_id, **campos):
+        """Substitui os campos informados (ex.: titulo=..., historico=...) da tarefa."""
+        with self._lock:
+            atuais = self._campos.setdefault(doc_id, {})
+            for campo, texto in campos.items():
+                atuais[campo] = Counter(self.termos(texto))
+            self._reindexar(doc_id)
+
+    def acrescentar(self, doc_id, campo: str, texto: str):
+        """Soma os termos de `texto` ao campo (ex.: uma nota nova no histórico)."""
+        with self._lock:
+            atuais = self._campos.setdefault(doc_id, {})
+            atuais[campo] = atuais.get(campo, Counter()) + Counter(self.termos(texto))
+            self._reindexar(doc_id)
+
+    def remover(self, doc_id):
+        with self._lock:
+            self._campos.pop(doc_id, None)
+            self._reindexar(doc_id)
+
+    # -----------------------------
+    # Consulta
+    # -----------------------------
+    def _expandir(self, termo: str, prefixo: bool) -> list:
+        if not prefixo or len(termo) < self.PREFIXO_MINIMO:
+            return [termo] if termo in self._postings else []
+        inicio = bisect.bisect_left(self._vocabulario, termo)
+        fim = bisect.bisect_left(self._vocabulario, termo + "\uffff")
+        termos = self._vocabulario[inicio:fim]
+        if len(termos) > self.MAX_EXPANSOES:
+            termos = heapq.nlargest(self.MAX_EXPANSOES, termos, key=lambda t: len(self._postings[t]))
+        return termos
+
+    def buscar(self, consulta: str, limite: int = None) -> list:
+        """[(id, pontuação)] das tarefas com todos os termos, da mais relevante para a menos.
+
+        Cada termo da consulta vale o BM25 da sua melhor expansão na tarefa. Só a cópia
+        das postings usadas é feita com o lock; o ranking roda fora dele, sem segurar
+        quem está atualizando o índice.
+        """
+        brutos = consulta.split()
+        with self._lock:
+            n_docs = len(self._pesos) or 1
+            media = (self._total / n_docs) or 1.0
+            grupos = []  # por termo da consulta: [(cópia das postings, idf)] das expansões
+            for i, bruto in enumerate(brutos):
+                termos = self.termos(bruto.rstrip("*"))
+                for j, termo in enumerate(termos):
+                    prefixo = j == len(termos) - 1 and (bruto.endswith("*") or i == len(brutos) - 1)
+                    expansoes = []
+                    for expansao in self._expandir(termo, prefixo):
+                        docs = self._postings[expansao]
+                        idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+                        expansoes.append((dict(docs), idf))
+                    if not expansoes:
+                        return []
+                    grupos.append(expansoes)
+        if not grupos:
+            return []
+        # tamanho lido sem lock: uma tarefa sendo reindexada agora pontua com o tamanho médio
+        tamanhos, normas = self._tamanhos, {}
+        # começa pelo termo mais raro: os demais só pontuam os candidatos que restarem
+        grupos.sort(key=lambda g: sum(len(docs) for docs, _ in g))
+        pontos = None
+        for expansoes in grupos:
+            melhores = {}
+            for docs, idf in expansoes:
+                # cada lista é percorrida uma vez (ou só os candidatos, se forem menos)
+                if pontos is None or len(docs) <= len(pontos):
+                    itens = docs.items()
+                else:
+                    itens = ((d, docs[d]) for d in pontos if d in docs)
+                for d, peso in itens:
+                    if pontos is not None and d not in pontos:
+                        continue
+                    norma = normas.get(d)
+                    if norma is None:
+                        norma = normas[d] = self.K1 * (1 - self.B + self.B * tamanhos.get(d, media) / media)
+                    ponto = idf * peso * (self.K1 + 1) / (peso + norma)
+                    if ponto > melhores.get(d, 0.0):
+                        melhores[d] = ponto
+            pontos = melhores if pontos is None else {d: pontos[d] + p for d, p in melhores.items()}
+            if not pontos:
+                return []
+        ranking = sorted(pontos.items(), key=lambda item: item[1], reverse=True)
+        return ranking[:limite] if limite else ranking
@@ -113,9 +113,8 @@ class InterfaceUI:
         st.info(msg)
 
     @staticmethod
-    def task_card(titulo: str, categoria: str, status: str, prazo: str, autor: str, data_criacao: str, cor: str, historico: str = ""):
-        st.markdown(
-            f"""
+    def _task_card_html(titulo: str, categoria: str, status: str, prazo: str, autor: str, data_criacao: str, cor: str, historico: str = "") -> str:
+        return f"""
             <div class="card" style="border-left:6px solid {cor};">
               <div style="display:flex;justify-content:space-between;align-items:center;">
                 <h4 style="margin:0;">{titulo}</h4>
@@ -129,6 +128,33 @@ class InterfaceUI:
               <div style="font-size:12px;color:#64748b;"><i>Criado em {data_criacao}</i></div>
               {"<div style='margin-top:10px; color:#334155;'><i>"+historico+"</i></div>" if historico else ""}
             </div>
-            """,
+            """
+
+    @staticmethod
+    def task_card(titulo: str, categoria: str, status: str, prazo: str, autor: str, data_criacao: str, cor: str, historico: str = ""):
+        st.markdown(
+            InterfaceUI._task_card_html(titulo, categoria, status, prazo, autor, data_criacao, cor, historico),
             unsafe_allow_html=True
         )
+
+    @staticmethod
+    def task_cards(cards: list):
+        """Renderiza vários cards (dicts com os argumentos de `task_card`) num único bloco HTML."""
+        if cards:
+            st.markdown("".join(InterfaceUI._task_card_html(**c) for c in cards), unsafe_allow_html=True)
+
+    @staticmethod
+    def painel_api(execucao):
+        """Painel recolhível na sidebar com as chamadas à API da execução atual."""
+        totais = execucao.totais()
+        with st.sidebar.expander(f"📡 API: {totais['chamadas']} chamadas", expanded=False):
+            if not execucao.chamadas:
+                st.caption("Nenhuma chamada à API nesta execução.")
+                return
+            c1, c2 = st.columns(2)
+            c1.metric("Tempo", f"{totais['duracao_ms']:.0f} ms")
+            c2.metric("Dados", f"{totais['bytes'] / 1024:.1f} KB")
+            st.dataframe(
+                [{k: c.get(k, "") for k in ["tipo", "aba", "faixa", "bytes", "duracao_ms", "erro"]} for c in execucao.chamadas],
+                use_container_width=True
+            )
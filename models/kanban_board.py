@@ -1,37 +1,147 @@
 import streamlit as st
 import pandas as pd
 
+from models.tarefa import STATUS as ESTADOS, tipar
+
 class KanbanBoard:
     def __init__(self, df: pd.DataFrame):
-        self.df = df.copy()
-        self.df["status"] = self.df["status"].fillna("Pendente")
-
-    def render(self, on_move):
-        cols = st.columns(3)
-        estados = ["Pendente", "Em andamento", "Concluída"]
-
-        for idx, estado in enumerate(estados):
-            with cols[idx]:
-                st.markdown(f"### {estado}")
-                subset = self.df[self.df["status"] == estado].sort_values("prazo", na_position="last")
-                if subset.empty:
-                    st.caption("Sem tarefas aqui.")
-                for _, row in subset.iterrows():
-                    with st.container(border=True):
-                        st.write(f"**{row['titulo']}**")
-                        st.caption(f"Prazo: {row.get('prazo','-')}  •  Cat.: {row.get('categoria','-')}")
-                        nota = st.text_input(
-                            "Nota (opcional)",
-                            key=f"nota_{row['id']}_{estado}",
-                            placeholder="Uma observação rápida para o histórico..."
-                        )
-                        # botões de mover
-                        bcols = st.columns(3)
-                        # Pendente: pode mover para Em andamento/Concluída
-                        # Em andamento: Pendente/Concluída
-                        # Concluída: Pendente/Em andamento
-                        alvos = [e for e in estados if e != estado]
-                        for bi, alvo in enumerate(alvos):
-                            if bcols[bi].button(f"→ {alvo}", key=f"mv_{row['id']}_{alvo}"):
-                                on_move(row["id"], alvo, nota)
-                                st.rerun()
+        self.df = tipar(df)  # status vazio já vira "Pendente"
+
+    def render_otimista(self, on_move, executor, on_move_lote=None):
+        """Quadro otimista: mover um card muda o estado local na hora e
+        `on_move(task_id, status, nota) -> bool` roda em segundo plano no `executor`
+        (um GravacoesOrdenadas).
+
+        O quadro é um fragmento: mover reexecuta só ele (sem reler o storage nem
+        redesenhar o resto da página), e a nota de cada card é um fragmento
+        próprio, para digitar não redesenhar o quadro. Um fragmento aninhado
+        acompanha as gravações a cada segundo e, se alguma falhar, desfaz o
+        movimento local. Com `on_move_lote(task_ids, status, nota) -> ids movidos`,
+        o quadro ganha seleção múltipla para mover várias tarefas numa única gravação.
+        """
+        pendentes = st.session_state.setdefault("kanban_pendentes", {})  # id -> status ainda não refletido
+        st.session_state.setdefault("kanban_gravacoes", [])  # (ids, status, Future)
+        atuais = dict(zip(self.df["id"], self.df["status"]))
+        for task_id, status in list(pendentes.items()):
+            if atuais.get(task_id) == status:
+                del pendentes[task_id]
+        _quadro(self.df, on_move, executor, on_move_lote)
+
+
+@st.fragment
+def _quadro(df: pd.DataFrame, on_move, executor, on_move_lote):
+    pendentes = st.session_state["kanban_pendentes"]
+    gravacoes = st.session_state["kanban_gravacoes"]
+    # registrado de novo a cada execução do quadro: o relógio liga com a primeira gravação
+    st.session_state["kanban_quadro"] = True
+    st.fragment(_acompanhar_gravacoes, run_every=1 if gravacoes else None)()
+
+    status = df["status"].where(~df["id"].isin(pendentes.keys()), df["id"].map(pendentes))
+    df = df.assign(status=status)
+    if on_move_lote is not None and not df.empty:
+        with st.expander("☑️ Mover várias tarefas"):
+            _selecao(df)
+            st.button("Mover selecionadas", on_click=_mover_selecionadas, args=(on_move_lote, executor))
+
+    cols = st.columns(3)
+    for idx, estado in enumerate(ESTADOS):
+        with cols[idx]:
+            st.markdown(f"### {estado}")
+            subset = df[df["status"] == estado].sort_values("prazo_dt", na_position="last")
+            if subset.empty:
+                st.caption("Sem tarefas aqui.")
+            for row in subset.itertuples(index=False):
+                _cartao(row, estado, on_move, executor)
+
+
+def _mover_um(on_move, task_id, status, nota) -> list:
+    return [task_id] if on_move(task_id, status, nota) else []
+
+
+def _acompanhar_gravacoes():
+    """Recolhe as gravações concluídas. Uma bem-sucedida não muda nada na tela (o card
+    já está na coluna nova); uma que falhou precisa redesenhar o quadro."""
+    pendentes = st.session_state["kanban_pendentes"]
+    gravacoes = st.session_state["kanban_gravacoes"]
+    desfeitas = False
+    for gravacao in [g for g in gravacoes if g[2].done()]:
+        ids, status, futuro = gravacao
+        gravacoes.remove(gravacao)
+        movidas = set(futuro.result() or []) if futuro.exception() is None else set()
+        falharam = [i for i in ids if i not in movidas]
+        for task_id in falharam:
+            if pendentes.get(task_id) == status:
+                del pendentes[task_id]
+                desfeitas = True
+        if falharam:
+            # guardado na sessão: a mensagem precisa sobreviver à reexecução abaixo
+            st.session_state.setdefault("kanban_erros", []).append(
+                f"Não foi possível mover {len(falharam)} tarefa(s): {', '.join(falharam[:5])}"
+            )
+    # dentro da execução do quadro, as colunas ainda vão ser desenhadas com o estado
+    # já corrigido; pelo relógio, só reexecutando (o fragmento do quadro não pode ser
+    # reexecutado daqui, então a página toda, o que só acontece quando algo falha)
+    if not st.session_state.pop("kanban_quadro", False) and desfeitas:
+        st.rerun()
+    for erro in st.session_state.pop("kanban_erros", []):
+        st.error(erro)
+    if gravacoes:
+        st.caption(f"⏳ {len(gravacoes)} alteração(ões) sendo gravada(s)...")
+
+
+def _mover_selecionadas(on_move_lote, executor):
+    """Callback do botão de lote: marca as tarefas como movidas e limpa a seleção."""
+    ids = list(st.session_state.get("kanban_selecao", []))
+    alvo = st.session_state["kanban_lote_alvo"]
+    nota = st.session_state.get("kanban_lote_nota", "")
+    if not ids:
+        return
+    pendentes = st.session_state["kanban_pendentes"]
+    for task_id in ids:
+        pendentes[task_id] = alvo
+    st.session_state["kanban_gravacoes"].append(
+        (tuple(ids), alvo, executor.enviar(ids, on_move_lote, ids, alvo, nota))
+    )
+    st.session_state["kanban_selecao"] = []
+    st.session_state["kanban_lote_nota"] = ""
+
+
+def _mover(task_id: str, estado: str, alvo: str, on_move, executor):
+    """Callback dos botões do card: roda antes da reexecução do quadro, que já o
+    desenha na coluna nova."""
+    nota = st.session_state.get(f"nota_{task_id}_{estado}", "")
+    st.session_state["kanban_pendentes"][task_id] = alvo
+    st.session_state["kanban_gravacoes"].append(
+        ((task_id,), alvo, executor.enviar([task_id], _mover_um, on_move, task_id, alvo, nota))
+    )
+
+
+@st.fragment
+def _selecao(df: pd.DataFrame):
+    rotulos = dict(zip(df["id"], df["titulo"].astype(str) + " · " + df["status"].astype(str)))
+    st.multiselect("Tarefas", list(rotulos), format_func=rotulos.get, key="kanban_selecao")
+    c1, c2 = st.columns([1, 2])
+    c1.selectbox("Mover para", ESTADOS, key="kanban_lote_alvo")
+    c2.text_input("Nota para todas (opcional)", key="kanban_lote_nota",
+                  placeholder="Registrada no histórico de cada tarefa...")
+
+
+@st.fragment
+def _nota(task_id: str, estado: str):
+    st.text_input(
+        "Nota (opcional)",
+        key=f"nota_{task_id}_{estado}",
+        placeholder="Uma observação rápida para o histórico..."
+    )
+
+
+def _cartao(row, estado: str, on_move, executor):
+    with st.container(border=True):
+        st.write(f"**{row.titulo}**")
+        st.caption(f"Prazo: {row.prazo or '-'}  •  Cat.: {row.categoria or '-'}")
+        _nota(row.id, estado)
+        bcols = st.columns(3)
+        alvos = [e for e in ESTADOS if e != estado]
+        for bi, alvo in enumerate(alvos):
+            bcols[bi].button(f"→ {alvo}", key=f"mv_{row.id}_{alvo}", on_click=_mover,
+                             args=(row.id, estado, alvo, on_move, executor))
@@ -0,0 +1,116 @@
+import hashlib
+import multiprocessing
+import os
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from textblob import TextBlob
+
+
+def _avaliar(texto: str) -> tuple:
+    """(soma das polaridades, nº de avaliações) de um trecho.
+
+    A polaridade do TextBlob é a média das avaliações do texto, então somas e
+    contagens de linhas diferentes podem ser combinadas sem reprocessar nada.
+    """
+    avaliacoes = TextBlob(texto).sentiment_assessments.assessments
+    return sum(a[1] for a in avaliacoes), len(avaliacoes)
+
+
+def _avaliar_lote(textos: list) -> list:
+    return [_avaliar(t) for t in textos]
+
+
+class MotorSentimento:
+    """Polaridade de históricos com cache persistente por hash de cada nota (linha).
+
+    Como os históricos só crescem, a cada visita apenas as linhas novas são
+    avaliadas; as faltantes são processadas em lotes num pool de processos.
+    O pool é criado uma vez, na primeira vez em que é preciso, e usa `forkserver`
+    (ou `spawn`): um `fork` do processo do Streamlit, que tem várias threads, pode
+    herdar um lock preso e travar.
+    """
+
+    def __init__(self, caminho: str = "sentimento_cache.db", processos: int = None,
+                 lote: int = 256, minimo_paralelo: int = 200):
+        self.processos = processos or os.cpu_count() or 1
+        self.lote = lote
+        self.minimo_paralelo = minimo_paralelo
+        self._lock = threading.Lock()
+        self._pool = None
+        self._lock_pool = threading.Lock()
+        self.conn = sqlite3.connect(caminho, check_same_thread=False)
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS sentimento (hash TEXT PRIMARY KEY, soma REAL, n INTEGER)")
+        self._cache = dict((h, (s, n)) for h, s, n in self.conn.execute("SELECT hash, soma, n FROM sentimento"))
+
+    @staticmethod
+    def _hash(texto: str) -> str:
+        return hashlib.sha1(texto.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _linhas(texto) -> list:
+        return [l for l in str(texto).split("\n") if l.strip()]
+
+    def _obter_pool(self) -> ProcessPoolExecutor:
+        with self._lock_pool:
+            if self._pool is None:
+                metodo = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.processos, mp_context=multiprocessing.get_context(metodo)
+                )
+            return self._pool
+
+    def fechar(self):
+        with self._lock_pool:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+
+    def _garantir(self, linhas: dict):
+        """Avalia e persiste as linhas (hash -> texto) ainda fora do cache."""
+        with self._lock:
+            faltando = {h: t for h, t in linhas.items() if h not in self._cache}
+        if not faltando:
+            return
+        hashes, textos = list(faltando), list(faltando.values())
+        if len(textos) >= self.minimo_paralelo and self.processos > 1:
+            lotes = [textos[i:i + self.lote] for i in range(0, len(textos), self.lote)]
+            try:
+                resultados = [r for lote in self._obter_pool().map(_avaliar_lote, lotes) for r in lote]
+            except BrokenProcessPool as e:
+                # Um worker morreu (ex.: OOM): descarta o pool e avalia aqui mesmo.
+                print(f"Pool de sentimento quebrado, avaliando em série: {e}")
+                self.fechar()
+                resultados = _avaliar_lote(textos)
+        else:
+            resultados = _avaliar_lote(textos)
+        novos = dict(zip(hashes, resultados))
+        with self._lock:
+            self._cache.update(novos)
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO sentimento VALUES (?, ?, ?)",
+                    [(h, s, n) for h, (s, n) in novos.items()]
+                )
+
+    def pontuar(self, historicos) -> list:
+        """Polaridade de cada histórico (mesma ordem), reaproveitando as linhas já avaliadas."""
+        linhas_por_historico = [self._linhas(h) for h in historicos]
+        por_historico = [[self._hash(l) for l in linhas] for linhas in linhas_por_historico]
+        self._garantir({
+            h: l for linhas, hashes in zip(linhas_por_historico, por_historico) for h, l in zip(hashes, linhas)
+        })
+        pontuacoes = []
+        with self._lock:
+            for hashes in por_historico:
+                soma = sum(self._cache[h][0] for h in hashes)
+                n = sum(self._cache[h][1] for h in hashes)
+                pontuacoes.append(soma / n if n else 0.0)
+        return pontuacoes
+
+    def media(self, historicos) -> float:
+        pontuacoes = self.pontuar(historicos)
+        return sum(pontuacoes) / len(pontuacoes) if pontuacoes else 0.0
@@ -1,15 +1,149 @@
 from datetime import datetime
 import uuid
 
+import pandas as pd
+
+CATEGORIAS = ["Pessoal", "Trabalho", "Estudo", "Outro"]
+STATUS = ["Pendente", "Em andamento", "Concluída"]
+FORMATO_PRAZO = "%d/%m/%Y"
+FORMATO_CARIMBO = "%d/%m/%Y %H:%M"
+
+# -----------------------------
+# Esquema das colunas (ordem oficial da planilha)
+# -----------------------------
+# tipo: "texto" | "data" (formato) | "categoria" (valores conhecidos) | "autor" | "versao" (valor se vazio)
+ESQUEMA = {
+    "id": ("texto", None),
+    "data_criacao": ("data", FORMATO_CARIMBO),
+    "titulo": ("texto", None),
+    "categoria": ("categoria", CATEGORIAS),
+    "prazo": ("data", FORMATO_PRAZO),
+    "status": ("categoria", STATUS),
+    "historico": ("texto", None),
+    "ultima_atualizacao": ("data", FORMATO_CARIMBO),
+    "autor": ("autor", None),
+    "versao": ("versao", 0),  # "<id>:<n>", n sobe a cada gravação; 0 = linha anterior à coluna
+}
+COLUNAS = list(ESQUEMA)
+
+
+def normalizar_autor(nome) -> str:
+    return str(nome or "").strip().lower()
+
+
+def numero_versao(versao) -> int:
+    """n de uma versão "<id>:<n>" (ou só "<n>", como nas linhas antigas); 0 se vazia ou inválida.
+
+    Um "*" no fim (gravação reivindicada, campos ainda a caminho) é ignorado.
+    """
+    numero = str(versao if versao is not None else "").strip().rstrip("*").rpartition(":")[2]
+    return int(numero) if numero.isdigit() else 0
+
+
+def proxima_versao(versao, task_id: str) -> str:
+    """Versão gravada após `versao`: "<id>:<n + 1>" ("" ou inválida -> "<id>:1").
+
+    O id faz parte do valor para que a troca de versão na planilha (um findReplace
+    restrito à célula) nunca case com a de outra tarefa que tenha ido parar na linha.
+    """
+    return f"{task_id}:{numero_versao(versao) + 1}"
+
+
 class Tarefa:
+    __slots__ = tuple(COLUNAS)
+
     def __init__(self, titulo: str, categoria: str, prazo_str: str):
         self.id = str(uuid.uuid4())[:8]
-        self.data_criacao = datetime.now().strftime("%d/%m/%Y %H:%M")
+        self.data_criacao = datetime.now().strftime(FORMATO_CARIMBO)
         self.titulo = titulo
         self.categoria = categoria
         self.prazo = prazo_str
         self.status = "Pendente"
+        self.historico = ""
+        self.ultima_atualizacao = ""
+        self.autor = ""
+        self.versao = proxima_versao("", self.id)
+
+    def to_linha(self) -> list:
+        """Linha completa, na ordem de COLUNAS, montada a partir dos slots."""
+        return [getattr(self, coluna) for coluna in COLUNAS]
+
+    @classmethod
+    def validar(cls, titulo, categoria, prazo) -> tuple:
+        """(Tarefa, None) se os campos são válidos, senão (None, mensagem de erro).
+
+        O prazo aceita dd/mm/aaaa ou aaaa-mm-dd e é gravado como dd/mm/aaaa.
+        """
+        titulo = str(titulo or "").strip()
+        categoria = str(categoria or "").strip()
+        prazo = str(prazo or "").strip()
+        if not titulo:
+            return None, "título vazio"
+        if categoria not in CATEGORIAS:
+            return None, f"categoria '{categoria}' inválida (use {', '.join(CATEGORIAS)})"
+        for formato in (FORMATO_PRAZO, "%Y-%m-%d"):
+            try:
+                prazo = datetime.strptime(prazo, formato).strftime(FORMATO_PRAZO)
+                break
+            except ValueError:
+                continue
+        else:
+            return None, f"prazo '{prazo}' inválido (use dd/mm/aaaa)"
+        return cls(titulo, categoria, prazo), None
+
+
+# -----------------------------
+# Tipagem vetorizada do DataFrame
+# -----------------------------
+def _datas(serie: pd.Series, formato: str) -> pd.Series:
+    """Parse com o formato declarado; só os valores fora dele caem no parse genérico (dia primeiro)."""
+    texto = serie.astype(str).str.strip()
+    datas = pd.to_datetime(texto, format=formato, errors="coerce")
+    falhas = datas.isna() & texto.ne("") & texto.ne("nan")
+    if falhas.any():
+        datas[falhas] = pd.to_datetime(texto[falhas], errors="coerce", dayfirst=True, format="mixed")
+    return datas
+
+
+def _categorias(serie: pd.Series, conhecidas: list, padrao: str = None) -> pd.Series:
+    texto = serie.astype(str).str.strip().replace("nan", "")
+    if padrao is not None:
+        texto = texto.mask(texto.eq(""), padrao)
+    extras = sorted(set(texto.unique()) - set(conhecidas))
+    return texto.astype(pd.CategoricalDtype(conhecidas + extras))
+
+
+def tipar(df: pd.DataFrame) -> pd.DataFrame:
+    """Cópia de `df` com os tipos do ESQUEMA, calculados uma vez na carga.
+
+    - categoria/status/autor viram categóricas (status vazio = "Pendente");
+    - cada coluna de data ganha uma irmã `<coluna>_dt` (datetime64), a original
+      continua como texto para exibição;
+    - `autor_norm` guarda o autor normalizado (strip + minúsculas) para filtros;
+    - `versao` vira o número da versão (int), vazia valendo o padrão do ESQUEMA.
+
+    Colunas ausentes são ignoradas e colunas já tipadas não são refeitas.
+    """
+    df = df.copy()
+    for coluna, (tipo, parametro) in ESQUEMA.items():
+        if coluna not in df.columns:
+            continue
+        if tipo == "data" and f"{coluna}_dt" not in df.columns:
+            df[f"{coluna}_dt"] = _datas(df[coluna], parametro)
+        elif tipo == "categoria" and not isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            df[coluna] = _categorias(df[coluna], parametro, padrao="Pendente" if coluna == "status" else None)
+        elif tipo == "versao" and not pd.api.types.is_integer_dtype(df[coluna]):
+            numero = df[coluna].astype(str).str.rstrip("*").str.split(":").str[-1]
+            df[coluna] = pd.to_numeric(numero, errors="coerce").fillna(parametro).astype(int)
+        elif tipo == "autor" and "autor_norm" not in df.columns:
+            autor = df[coluna].astype(str).replace("nan", "")
+            df[coluna] = autor.astype("category")
+            df["autor_norm"] = autor.str.strip().str.lower().astype("category")
+    return df
+
+
+def colunas_tipadas(colunas: list) -> list:
+    """`colunas` + as derivadas que `tipar` acrescenta para elas."""
+    derivadas = [f"{c}_dt" for c in colunas if ESQUEMA.get(c, ("",))[0] == "data"]
+    return list(colunas) + derivadas + (["autor_norm"] if "autor" in colunas else [])
 
-    def to_list(self):
-        # id | data_criacao | titulo | categoria | prazo | status
-        return [self.id, self.data_criacao, self.titulo, self.categoria, self.prazo, self.status]
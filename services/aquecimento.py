@@ -0,0 +1,82 @@
+import threading
+
+
+class Aquecimento:
+    """Pré-carga em segundo plano, disparada logo após o login.
+
+    Cada etapa é uma função executada no pool recebido; etapas independentes
+    rodam em paralelo e `depois` encadeia as que precisam do resultado de outra.
+    `cancelar` (ex.: no logout) tira da fila o que ainda não começou e impede
+    que etapas dependentes sejam agendadas; uma leitura já em andamento vai até
+    o fim, mas nada mais é disparado a partir dela.
+    """
+
+    def __init__(self, executor):
+        self._executor = executor
+        self._lock = threading.Lock()
+        self._cancelado = threading.Event()
+        self._futuros = {}  # nome -> Future
+        self._pendentes = set()  # etapas agendadas ou à espera de outra
+        self._total = 0
+        self.erros = {}  # nome -> mensagem
+
+    def iniciar(self, nome: str, funcao, depois: dict = None):
+        """Agenda `funcao()`; cada `depois[nome] (resultado)` roda quando ela terminar bem."""
+        depois = depois or {}
+        with self._lock:
+            if self._cancelado.is_set():
+                return
+            self._total += 1 + len(depois)
+            self._pendentes.update([nome, *depois])
+        self._agendar(nome, funcao, depois)
+
+    def _agendar(self, nome: str, funcao, depois: dict):
+        with self._lock:
+            if self._cancelado.is_set():
+                self._pendentes.difference_update([nome, *depois])
+                return
+            futuro = self._executor.submit(self._executar, nome, funcao)
+            self._futuros[nome] = futuro
+        futuro.add_done_callback(lambda f: self._encadear(nome, f, depois))
+
+    def _executar(self, nome: str, funcao):
+        if self._cancelado.is_set():
+            return None
+        try:
+            return funcao()
+        except Exception as e:
+            print(f"Erro no aquecimento ({nome}): {e}")
+            self.erros[nome] = str(e)
+            raise
+
+    def _encadear(self, nome: str, futuro, depois: dict):
+        with self._lock:
+            self._pendentes.discard(nome)
+        if futuro.cancelled() or futuro.exception() is not None or self._cancelado.is_set():
+            with self._lock:
+                self._pendentes.difference_update(depois)
+            return
+        resultado = futuro.result()
+        for proximo, funcao in depois.items():
+            self._agendar(proximo, lambda funcao=funcao: funcao(resultado), {})
+
+    def cancelar(self):
+        with self._lock:
+            self._cancelado.set()
+            futuros = list(self._futuros.values())
+        for futuro in futuros:
+            futuro.cancel()
+
+    @property
+    def cancelado(self) -> bool:
+        return self._cancelado.is_set()
+
+    @property
+    def ativo(self) -> bool:
+        with self._lock:
+            return bool(self._pendentes)
+
+    def progresso(self) -> tuple:
+        """(etapas concluídas, total de etapas)."""
+        with self._lock:
+            return self._total - len(self._pendentes), self._total
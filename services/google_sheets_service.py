@@ -1,48 +1,952 @@
+import atexit
+import threading
+import time
+from collections import deque
 import streamlit as st
 import gspread
+import numpy as np
 import pandas as pd
 from datetime import datetime
+from gspread.utils import a1_to_rowcol, rowcol_to_a1
 from google.oauth2.service_account import Credentials
 
-class GoogleSheetsService:
-    def __init__(self, sheet_name: str):
-        scopes = ["https://www.googleapis.com/auth/spreadsheets"]
-        credentials = Credentials.from_service_account_info(
-            st.secrets["gcp_service_account"], scopes=scopes
-        )
-        client = gspread.authorize(credentials)
-        self.sheet = client.open_by_key(sheet_name).sheet1  # aba principal
+from models.tarefa import colunas_tipadas, normalizar_autor, numero_versao, proxima_versao, tipar
+from services.sheets_client import LimitadorCota, WorksheetClient
+from services.storage import TarefasStorage
+
+class LogBuffer:
+    """Fila de logs em memória, descarregada em segundo plano com append_rows.
+
+    O envio acontece quando a fila atinge `max_itens` ou a cada `intervalo`
+    segundos, e uma última vez no encerramento do processo. `particao(linha)`
+    escolhe a aba de destino de cada linha (`obter_aba(chave)`), e
+    `ao_gravar(chave, linhas, resposta)` é chamado após cada append bem-sucedido.
+    As linhas de uma aba que falha voltam para a fila; após `max_falhas` envios
+    seguidos sem sucesso (aba removida, cota da partição...), vão para
+    `descartadas` em vez de crescer a fila para sempre.
+    """
+
+    def __init__(self, obter_aba, max_itens: int = 50, intervalo: float = 5.0,
+                 particao=None, ao_gravar=None, max_falhas: int = 5):
+        self._obter_aba = obter_aba
+        self._abas = {}
+        self._particao = particao or (lambda linha: None)
+        self._ao_gravar = ao_gravar
+        self.max_itens = max_itens
+        self.intervalo = intervalo
+        self.max_falhas = max_falhas
+        self._falhas = {}  # chave -> envios seguidos que falharam
+        self.descartadas = deque(maxlen=10000)  # linhas desistidas (as mais recentes)
+        self._fila = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="log-buffer", daemon=True)
+        self._thread.start()
+        atexit.register(self.fechar)
+
+    def adicionar(self, linhas: list):
+        with self._lock:
+            self._fila.extend(linhas)
+            cheio = len(self._fila) >= self.max_itens
+        if cheio:
+            self._acordar.set()
+
+    def pendentes(self) -> int:
+        with self._lock:
+            return len(self._fila)
+
+    def flush(self) -> int:
+        """Grava tudo o que está na fila; retorna quantas linhas foram enviadas."""
+        with self._flush_lock:
+            with self._lock:
+                lote, self._fila = self._fila, []
+            grupos = {}
+            for linha in lote:
+                grupos.setdefault(self._particao(linha), []).append(linha)
+            enviadas, falhas = 0, []
+            for chave, linhas in grupos.items():
+                try:
+                    if chave not in self._abas:
+                        self._abas[chave] = self._obter_aba(chave)
+                    resposta = self._abas[chave].append_rows(linhas)
+                except Exception as e:
+                    self._abas.pop(chave, None)
+                    seguidas = self._falhas.get(chave, 0) + 1
+                    if seguidas >= self.max_falhas:
+                        self._falhas.pop(chave, None)
+                        self.descartadas.extend(linhas)
+                        print(f"ATENÇÃO: {len(linhas)} log(s) de '{chave}' descartado(s) após {seguidas} falhas: {e}")
+                    else:
+                        # devolve as linhas para a frente da fila, para a próxima tentativa
+                        self._falhas[chave] = seguidas
+                        falhas.extend(linhas)
+                        print(f"Erro ao gravar logs (tentativa {seguidas}): {e}")
+                    continue
+                self._falhas.pop(chave, None)
+                enviadas += len(linhas)
+                if self._ao_gravar is not None:
+                    try:
+                        self._ao_gravar(chave, linhas, resposta)
+                    except Exception as e:
+                        print(f"Erro ao atualizar índice de logs: {e}")
+            if falhas:
+                with self._lock:
+                    self._fila[:0] = falhas
+            return enviadas
+
+    def fechar(self):
+        self._parar.set()
+        self._acordar.set()
+        self._thread.join(timeout=self.intervalo)
+        self.flush()
+
+    def _loop(self):
+        while not self._parar.is_set():
+            self._acordar.wait(self.intervalo)
+            self._acordar.clear()
+            self.flush()
+
+
+class GoogleSheetsService(TarefasStorage):
+    def __init__(self, sheet_name: str, ttl_cache: float = 300, ttl_completo: float = 3600,
+                 cota_por_minuto: int = 60, cliente=None):
+        # `cliente` permite trocar o gspread por um falso em memória (ex.: benchmarks)
+        client = cliente
+        if client is None:
+            scopes = ["https://www.googleapis.com/auth/spreadsheets"]
+            credentials = Credentials.from_service_account_info(
+                st.secrets["gcp_service_account"], scopes=scopes
+            )
+            client = gspread.authorize(credentials)
+        # todas as abas dividem o mesmo limitador (a cota é por usuário/projeto)
+        self.limitador = LimitadorCota(cota_por_minuto)
+        self.sheet = WorksheetClient(client.open_by_key(sheet_name).sheet1, self.limitador)  # aba principal
+        self._abas = {}  # título -> WorksheetClient (evita a busca de metadados a cada uso)
+        self._particoes = None  # mes -> {"aba", "linhas", "usuarios", "linha_indice"}
+        self._particoes_expira = 0.0
+        self._lock_particoes = threading.Lock()
+        self.logs = LogBuffer(self._aba_log, particao=self._mes_do_log, ao_gravar=self._registrar_particao)
+        self._headers = None
+        self._indice_ids = None  # id -> número da linha
+        self._lock_indice = threading.Lock()
+        # cache de tarefas compartilhado por todas as sessões do processo
+        # (índice do DataFrame = número da linha na planilha)
+        self.ttl_cache = ttl_cache
+        self.ttl_completo = ttl_completo
+        self._cache_df = None
+        self._cache_expira = 0.0
+        self._cache_completo_expira = 0.0
+        self._cache_sujo = False
+        self._linhas_sujas = set()
+        self._n_linhas = 0
+        self._watermark = None  # início da última sincronização (precisão de minuto)
+        self._carimbos = (pd.Series(dtype=object), pd.Series(dtype="datetime64[ns]"))  # textos e datas já parseados
+        self._tipado = None  # _cache_df passado por `tipar` (None = retipar tudo)
+        self._linhas_retipar = set()  # linhas de _cache_df alteradas/anexadas desde o último `tipar`
+        self._por_autor = {}  # autor normalizado -> posições das suas linhas em _tipado
+        self._lock_cache = threading.Lock()
+        # notas append-only (aba 'Notas'), agrupadas por tarefa
+        self._notas = None
+        self._n_notas = 0
+        self._notas_expira = 0.0
+        self._lock_notas = threading.Lock()
 
-    def carregar_tarefas(self) -> pd.DataFrame:
+    def headers(self) -> list:
+        """Cabeçalhos normalizados da aba principal (lidos uma vez)."""
+        if self._headers is None:
+            self._headers = [h.strip().lower() for h in self.sheet.row_values(1)]
+        return self._headers
+
+    # -----------------------------
+    # Índice id -> linha
+    # -----------------------------
+    def _construir_indice(self):
+        headers = self.headers()
+        if "id" not in headers:
+            self._indice_ids = {}
+            return
+        ids = self.sheet.col_values(headers.index("id") + 1)
+        self._indice_ids = {v: i for i, v in enumerate(ids[1:], start=2) if v}
+
+    def ids_gravados(self, task_ids: list) -> set:
+        """Quais de `task_ids` estão na planilha agora (relê a coluna 'id', refazendo o índice)."""
+        with self._lock_indice:
+            self._construir_indice()
+            return {i for i in task_ids if i in self._indice_ids}
+
+    def registrar_linhas_anexadas(self, task_ids: list, resposta: dict):
+        """Atualiza o índice a partir da resposta de um append_row(s): as linhas são
+        consecutivas a partir do início da faixa."""
         try:
-            data = self.sheet.get_all_records()
-            df = pd.DataFrame(data)
-        except Exception as e:
-            print(f"Erro ao carregar planilha: {e}")
-            return pd.DataFrame()
-
-        df.columns = [c.strip().lower() for c in df.columns]
-        required = ["id","data_criacao","titulo","categoria","prazo","status","historico","ultima_atualizacao","autor"]
-        for c in required:
+            faixa = resposta["updates"]["updatedRange"].split("!")[-1]
+            row_num = a1_to_rowcol(faixa.split(":")[0])[0]
+        except (KeyError, TypeError, IndexError, ValueError):
+            # resposta inesperada: deixa o índice ser reconstruído na próxima busca
+            with self._lock_indice:
+                self._indice_ids = None
+            return
+        with self._lock_indice:
+            if self._indice_ids is not None:
+                for i, task_id in enumerate(task_ids):
+                    self._indice_ids[task_id] = row_num + i
+
+    # -----------------------------
+    # Cache de tarefas + sincronização incremental
+    # -----------------------------
+    def carregar_tarefas(self, columns=None, autor: str = None) -> pd.DataFrame:
+        """Tarefas do cache compartilhado (índice = linha na planilha).
+
+        `columns` restringe as colunas baixadas e devolvidas (ex.: sem 'historico');
+        cada coluna é lida uma vez, com batch_get só sobre as faixas necessárias.
+        Quando o cache expira ou é invalidado, busca apenas as linhas anexadas e as
+        alteradas desde a última sincronização; a releitura completa fica para o
+        primeiro acesso, para o `ttl_completo` e para quando a planilha muda de forma.
+        Com `autor`, devolve só as linhas dele usando o índice por autor (`_por_autor`).
+        Erros da API que esgotam as novas tentativas do WorksheetClient são propagados,
+        para a página mostrar o erro em vez de uma lista vazia.
+        """
+        with self._lock_cache:
+            pedidas = list(columns) if columns else list(self.COLUNAS)
+            necessarias = list(dict.fromkeys(pedidas + ["autor"])) if autor is not None else pedidas
+            agora = time.monotonic()
+            if self._cache_df is None or agora >= self._cache_completo_expira:
+                self._recarregar(necessarias)
+            else:
+                if (self._cache_sujo or agora >= self._cache_expira) and not self._sincronizar():
+                    self._recarregar(necessarias)
+                faltando = [c for c in necessarias if c not in self._cache_df.columns]
+                if faltando:
+                    self._carregar_colunas(faltando)
+            self._atualizar_tipado()
+            colunas = colunas_tipadas(pedidas)
+            if autor is None:
+                return self._tipado[colunas].copy()
+            # só as posições do autor: o custo acompanha as tarefas dele, não a planilha
+            posicoes = self._por_autor.get(normalizar_autor(autor), [])
+            return self._tipado.iloc[posicoes, self._tipado.columns.get_indexer(colunas)].copy()
+
+    def _indexar_autores(self):
+        self._por_autor = (
+            self._tipado.groupby("autor_norm", observed=True).indices
+            if "autor_norm" in self._tipado.columns else {}
+        )
+
+    def _atualizar_tipado(self):
+        """Põe `_tipado` e `_por_autor` em dia com `_cache_df` (chamado com `_lock_cache`).
+
+        Só uma recarga completa ou coluna nova passa o cache inteiro por `tipar`; depois
+        de escritas e deltas, só as linhas alteradas ou anexadas são tipadas e aplicadas
+        no lugar, e o índice por autor só é refeito se alguma delas mudou de autor.
+        """
+        if self._tipado is None:
+            self._tipado = tipar(self._cache_df)
+            self._indexar_autores()
+            self._linhas_retipar.clear()
+            return
+        if not self._linhas_retipar:
+            return
+        linhas = self._cache_df.index.intersection(sorted(self._linhas_retipar))
+        self._linhas_retipar.clear()
+        novas = tipar(self._cache_df.loc[linhas])
+        # mesmas categorias dos dois lados, para a atribuição e o concat manterem as categóricas
+        for c in novas.columns:
+            if isinstance(self._tipado[c].dtype, pd.CategoricalDtype):
+                extras = novas[c].cat.categories.difference(self._tipado[c].cat.categories)
+                if len(extras):
+                    self._tipado[c] = self._tipado[c].cat.add_categories(extras)
+                novas[c] = novas[c].cat.set_categories(self._tipado[c].cat.categories)
+        existentes = linhas.intersection(self._tipado.index)
+        anexadas = linhas.difference(self._tipado.index)
+        mudou_autor = False
+        if len(existentes):
+            if "autor_norm" in novas.columns:
+                mudou_autor = self._tipado.loc[existentes, "autor_norm"].ne(novas.loc[existentes, "autor_norm"]).any()
+            self._tipado.loc[existentes, novas.columns] = novas.loc[existentes]
+        if len(anexadas):
+            inicio = len(self._tipado)
+            self._tipado = pd.concat([self._tipado, novas.loc[anexadas]])
+            if "autor_norm" in novas.columns and not mudou_autor:
+                por_autor = dict(self._por_autor)
+                grupos = novas.loc[anexadas].reset_index(drop=True).groupby("autor_norm", observed=True).indices
+                for autor, posicoes in grupos.items():
+                    anteriores = por_autor.get(autor, np.empty(0, dtype=np.intp))
+                    por_autor[autor] = np.concatenate([anteriores, posicoes + inicio])
+                self._por_autor = por_autor
+        if mudou_autor:
+            self._indexar_autores()
+
+    def iterar_tarefas(self, bloco: int = 5000):
+        """Lê a aba principal em faixas de `bloco` linhas, reordenando as colunas para COLUNAS."""
+        headers = self.headers()
+        ultima = rowcol_to_a1(1, len(headers))[:-1]
+        posicoes = [headers.index(c) if c in headers else None for c in self.COLUNAS]
+        inicio = 2
+        while True:
+            linhas = self.sheet.get(f"A{inicio}:{ultima}{inicio + bloco - 1}")
+            linhas = [list(l) + [""] * (len(headers) - len(l)) for l in linhas]
+            yield [[l[p] if p is not None else "" for p in posicoes] for l in linhas if any(l)]
+            if len(linhas) < bloco:
+                return
+            inicio += bloco
+
+    def invalidar_cache(self, linhas=()):
+        """Chamado após cada escrita na aba principal; `linhas` são as linhas alteradas."""
+        with self._lock_cache:
+            self._linhas_sujas.update(linhas)
+            self._cache_sujo = True
+
+    def _agora_watermark(self) -> datetime:
+        return datetime.now().replace(second=0, microsecond=0)
+
+    def _faixa_coluna(self, coluna: str, ate: int = None) -> str:
+        letra = rowcol_to_a1(1, self.headers().index(coluna) + 1)[:-1]
+        return f"{letra}2:{letra}{ate or ''}"
+
+    def _ler_colunas(self, colunas: list, ate: int = None):
+        """Lê as colunas pedidas com um único batch_get; retorna (DataFrame, nº de linhas)."""
+        headers = self.headers()
+        presentes = [c for c in colunas if c in headers]
+        blocos = self.sheet.batch_get([self._faixa_coluna(c, ate) for c in presentes]) if presentes else []
+        valores = {c: [r[0] if r else "" for r in b] for c, b in zip(presentes, blocos)}
+        n = ate - 1 if ate else max((len(v) for v in valores.values()), default=0)
+        dados = {c: (valores.get(c, []) + [""] * n)[:n] for c in colunas}
+        return pd.DataFrame(dados, index=range(2, n + 2)), n
+
+    def _recarregar(self, pedidas: list):
+        watermark = self._agora_watermark()
+        # 'versao' sempre junto: é a versão esperada nas gravações (compare-and-set)
+        colunas = ["id", "versao"] + list(self._cache_df.columns if self._cache_df is not None else [])
+        colunas = list(dict.fromkeys(colunas + pedidas))
+        self._headers = None  # relê os cabeçalhos numa recarga completa
+        df, n = self._ler_colunas(colunas)
+        self._cache_df = df
+        self._tipado = None
+        self._n_linhas = n
+        self._watermark = watermark
+        self._linhas_sujas.clear()
+        self._cache_sujo = False
+        agora = time.monotonic()
+        self._cache_expira = agora + self.ttl_cache
+        self._cache_completo_expira = agora + self.ttl_completo
+
+    def _carregar_colunas(self, colunas: list):
+        """Acrescenta ao cache colunas ainda não baixadas, limitadas às linhas conhecidas."""
+        df, _ = self._ler_colunas(colunas, ate=self._n_linhas + 1)
+        for c in colunas:
+            self._cache_df[c] = df[c].reindex(self._cache_df.index, fill_value="")
+        self._tipado = None  # coluna nova: tipa tudo de novo
+
+    def _montar_df(self, linhas: list, indices: list) -> pd.DataFrame:
+        headers = self.headers()
+        linhas = [(l + [""] * (len(headers) - len(l)))[:len(headers)] for l in linhas]
+        df = pd.DataFrame(linhas, columns=headers, index=indices)
+        for c in self._cache_df.columns:
             if c not in df.columns:
                 df[c] = ""
-        df = df.dropna(how="all")
-        return df
+        return df[self._cache_df.columns]
+
+    def _datas_carimbos(self, carimbos: list) -> pd.Series:
+        """'ultima_atualizacao' parseada (índice = linha); só os textos que mudaram desde a
+        última sincronização passam pelo parse, os demais reaproveitam a data anterior."""
+        textos = pd.Series(carimbos, index=range(2, len(carimbos) + 2), dtype=object)
+        anteriores, datas = self._carimbos
+        anteriores = anteriores.reindex(textos.index)
+        datas = datas.reindex(textos.index)
+        mudaram = textos.ne(anteriores)
+        if mudaram.any():
+            datas[mudaram] = pd.to_datetime(textos[mudaram], format=self.FORMATO_CARIMBO, errors="coerce")
+        self._carimbos = (textos, datas)
+        return datas
+
+    def _sincronizar(self) -> bool:
+        """Delta: lê só as colunas 'id' e 'ultima_atualizacao' e depois as linhas necessárias.
+
+        Retorna False quando o delta não é confiável (linhas removidas ou deslocadas)
+        e é preciso recarregar tudo.
+        """
+        headers = self.headers()
+        if "id" not in headers:
+            return False
+        watermark = self._agora_watermark()
+        ultima = rowcol_to_a1(1, len(headers))[:-1]
+        faixas = [self._faixa_coluna("id")]
+        if "ultima_atualizacao" in headers:
+            faixas.append(self._faixa_coluna("ultima_atualizacao"))
+        colunas = self.sheet.batch_get(faixas)
+        ids = [r[0] if r else "" for r in colunas[0]]
+        carimbos = [r[0] if r else "" for r in colunas[1]] if len(colunas) > 1 else []
+
+        n_atual = len(ids)
+        if n_atual < self._n_linhas:
+            return False
+        # comparação vetorizada: o custo é o de duas colunas, não um laço Python por linha
+        em_cache = self._cache_df["id"]
+        atuais = pd.Series(ids[:self._n_linhas], index=range(2, self._n_linhas + 2)).reindex(em_cache.index)
+        if (atuais.ne(em_cache) & em_cache.ne("")).any():
+            return False
+
+        alteradas = set(l for l in self._linhas_sujas if 2 <= l <= self._n_linhas + 1)
+        if carimbos:
+            datas = self._datas_carimbos(carimbos[:self._n_linhas])
+            alteradas.update(datas.index[datas >= self._watermark].tolist())
+        if len(alteradas) > max(50, self._n_linhas // 4):
+            return False
+
+        alteradas = sorted(alteradas)
+        faixas = [f"A{l}:{ultima}{l}" for l in alteradas]
+        if n_atual > self._n_linhas:
+            faixas.append(f"A{self._n_linhas + 2}:{ultima}{n_atual + 1}")
+        blocos = self.sheet.batch_get(faixas) if faixas else []
+
+        df = self._cache_df
+        linhas_lidas = []
+        if alteradas:
+            linhas_lidas = [list(b[0]) if b else [] for b in blocos[:len(alteradas)]]
+            novas = self._montar_df(linhas_lidas, alteradas)
+            df.loc[alteradas, :] = novas
+        if n_atual > self._n_linhas:
+            bloco = [list(l) for l in blocos[-1]]
+            bloco += [[]] * (n_atual - self._n_linhas - len(bloco))
+            linhas_lidas = linhas_lidas + bloco
+            anexadas = self._montar_df(bloco, list(range(self._n_linhas + 2, n_atual + 2)))
+            df = pd.concat([df, anexadas])
+        # linhas completas alteradas por outras instâncias também atualizam a busca
+        for linha in linhas_lidas:
+            registro = dict(zip(headers, linha))
+            if registro.get("id"):
+                self._indexar(registro["id"], registro, autor=registro.get("autor", ""))
+
+        self._cache_df = df
+        self._linhas_retipar.update(alteradas)
+        self._linhas_retipar.update(range(self._n_linhas + 2, n_atual + 2))
+        self._n_linhas = n_atual
+        self._watermark = watermark
+        self._linhas_sujas.clear()
+        self._cache_sujo = False
+        self._cache_expira = time.monotonic() + self.ttl_cache
+        return True
+
+    # -----------------------------
+    # Escritas
+    # -----------------------------
+    def _celulas_e_logs(self, row_num: int, antigo_dict: dict, updates: dict, usuario: str, agora: str):
+        """Células alteradas (para batch_update) e logs correspondentes de uma linha."""
+        headers = self.headers()
+        id_tarefa = antigo_dict.get("id", "N/A")
+        celulas, logs = [], []
+        for k, v in updates.items():
+            kl = k.strip().lower()
+            if kl in headers:
+                antigo = antigo_dict.get(kl, "")
+                novo = "" if v is None else str(v)
+                if str(antigo) != novo:
+                    celulas.append({"range": rowcol_to_a1(row_num, headers.index(kl) + 1), "values": [[novo]]})
+                    logs.append((usuario, id_tarefa, kl, antigo, novo))
+
+        # timestamp + log
+        if "ultima_atualizacao" in headers:
+            celulas.append({"range": rowcol_to_a1(row_num, headers.index("ultima_atualizacao") + 1), "values": [[agora]]})
+            logs.append((usuario, id_tarefa, "ultima_atualizacao", antigo_dict.get("ultima_atualizacao", ""), agora))
+        return celulas, logs
+
+    def _ler_linhas(self, linhas: dict) -> dict:
+        """id -> (linha, valores por coluna) para {id: nº da linha}, num único batch_get."""
+        headers = self.headers()
+        validas = {i: r for i, r in linhas.items() if r}
+        if not validas:
+            return {}
+        ultima = rowcol_to_a1(1, len(headers))[:-1]
+        blocos = self.sheet.batch_get([f"A{r}:{ultima}{r}" for r in validas.values()])
+        lidas = {}
+        for (task_id, row_num), bloco in zip(validas.items(), blocos):
+            valores = (bloco[0] if bloco else []) + [""] * len(headers)
+            antigo = dict(zip(headers, valores))
+            if antigo.get("id") == task_id:
+                lidas[task_id] = (row_num, antigo)
+        return lidas
+
+    # -----------------------------
+    # Gravação com versão (compare-and-set)
+    # -----------------------------
+    # Cada linha tem uma 'versao' "<id>:<n>" que sobe a cada gravação. Os valores
+    # antigos (para os logs) e a versão esperada vêm do cache; a troca da versão é um
+    # findReplace restrito à célula, que só acontece se ela ainda tiver a versão
+    # esperada. Como o id faz parte do valor, uma linha que mudou de lugar (ex.: outra
+    # removida acima dela) nunca casa com a de outra tarefa: vira conflito. A troca
+    # grava "<id>:<n + 1>*" e, depois do batch_update dos campos, a versão final (RAW)
+    # tira o "*"; quem perdeu e relê a linha ainda com "*" sabe que os campos do
+    # vencedor podem não ter chegado e espera.
+    # Só as linhas em conflito são relidas.
+    TENTATIVAS_CAS = 3
+    ESPERAS_CAS = (0.2, 0.5, 1.0)  # segundos entre releituras enquanto a versão tem "*"
+
+    def _coluna_versao(self) -> int:
+        """Nº da coluna 'versao'; planilhas anteriores a ela ganham a coluna ("<id>:1" em cada tarefa)."""
+        if "versao" not in self.headers():
+            with self._lock_indice:
+                headers = self.headers()
+                if "versao" not in headers:
+                    ids = self.sheet.col_values(headers.index("id") + 1) if "id" in headers else ["id"]
+                    letra = rowcol_to_a1(1, len(headers) + 1)[:-1]
+                    valores = [["versao"]] + [[proxima_versao("", i) if i else ""] for i in ids[1:]]
+                    self.sheet.update(range_name=f"{letra}1:{letra}{len(valores)}", values=valores)
+                    self._headers = headers + ["versao"]
+                    with self._lock_cache:
+                        self._cache_completo_expira = 0.0  # recarrega já com a coluna nova
+        return self.headers().index("versao") + 1
+
+    def _linhas_do_cache(self, linhas: dict, colunas: list) -> dict:
+        """id -> (linha, valores) tirados do cache, para {id: nº da linha}, sem ler a planilha.
+
+        Só entram linhas que o cache tem com o mesmo id, com uma versão e com todas as `colunas`.
+        """
+        with self._lock_cache:
+            df = self._cache_df
+            if df is None or not set(colunas) <= set(df.columns):
+                return {}
+            bases = {}
+            for task_id, row_num in linhas.items():
+                if row_num in df.index and df.at[row_num, "id"] == task_id and str(df.at[row_num, "versao"]).strip():
+                    bases[task_id] = (row_num, df.loc[row_num].to_dict())
+            return bases
+
+    def _bases(self, task_ids: list, campos: list) -> dict:
+        """id -> (linha, valores atuais): do cache quando possível; as demais num único batch_get."""
+        with self._lock_indice:
+            if self._indice_ids is None:
+                self._construir_indice()
+            linhas = {i: self._indice_ids.get(i) for i in task_ids}
+        bases = self._linhas_do_cache(linhas, ["id", "versao"] + campos)
+        frias = {i: r for i, r in linhas.items() if i not in bases}
+        if frias:
+            bases.update(self._ler_linhas_conferidas(frias))
+        return bases
+
+    def _ler_linhas_conferidas(self, linhas: dict) -> dict:
+        """`_ler_linhas`; as que não conferem (linhas deslocadas) são relidas após reconstruir o índice."""
+        lidas = self._ler_linhas(linhas)
+        faltando = [i for i in linhas if i not in lidas]
+        if faltando:
+            # índice desatualizado: reconstrói uma vez e lê só as que não conferiram
+            with self._lock_indice:
+                self._construir_indice()
+                novas = {i: self._indice_ids.get(i) for i in faltando}
+            lidas.update(self._ler_linhas(novas))
+        return lidas
+
+    def _aplicar_no_cache(self, novos: dict):
+        """Escreve no cache os valores gravados ({linha: {coluna: valor}}, com o 'id') e marca
+        as linhas para o delta; uma linha que no cache é de outra tarefa (a planilha mudou de
+        forma) fica para o delta, que então recarrega tudo."""
+        with self._lock_cache:
+            if self._cache_df is not None:
+                for row_num, valores in novos.items():
+                    if row_num in self._cache_df.index and self._cache_df.at[row_num, "id"] == valores["id"]:
+                        for coluna, valor in valores.items():
+                            if coluna in self._cache_df.columns:
+                                self._cache_df.at[row_num, coluna] = valor
+                        self._linhas_retipar.add(row_num)
+            self._linhas_sujas.update(novos)
+            self._cache_sujo = True
+
+    def _gravar_versionado(self, bases: dict, updates: dict, usuario: str) -> tuple:
+        """Uma rodada: reivindica as versões num único batchUpdate da planilha e grava as
+        linhas reivindicadas num único batch_update. Retorna (gravadas, em conflito)."""
+        headers = self.headers()
+        col_versao = headers.index("versao") + 1
+        pedidos, reivindicadas = [], []
+        for task_id, (row_num, antigo) in bases.items():
+            versao = str(antigo.get("versao", "")).strip()
+            if versao:  # sem versão (linha anterior à coluna) não há o que conferir
+                pedidos.append({"findReplace": {
+                    "find": versao, "replacement": proxima_versao(versao, task_id) + "*",
+                    "matchCase": True, "matchEntireCell": True,
+                    "range": {"sheetId": self.sheet.id, "startRowIndex": row_num - 1, "endRowIndex": row_num,
+                              "startColumnIndex": col_versao - 1, "endColumnIndex": col_versao},
+                }})
+                reivindicadas.append(task_id)
+        respostas = []
+        if pedidos:
+            respostas = self.sheet.chamar(
+                self.sheet.spreadsheet.batch_update, {"requests": pedidos}, idempotente=False
+            )["replies"]
+        conflitos = [
+            i for i, r in zip(reivindicadas, respostas) if not r.get("findReplace", {}).get("occurrencesChanged")
+        ]
+
+        agora = datetime.now().strftime(self.FORMATO_CARIMBO)
+        celulas, versoes, logs, novos, gravadas = [], [], [], {}, []
+        for task_id, (row_num, antigo) in bases.items():
+            if task_id in conflitos:
+                continue
+            c, l = self._celulas_e_logs(row_num, antigo, updates, usuario, agora)
+            versao = proxima_versao(antigo.get("versao"), task_id)
+            # depois dos campos: tira o "*" da reivindicação (ou cria a versão que faltava)
+            versoes.append({"range": rowcol_to_a1(row_num, col_versao), "values": [[versao]]})
+            celulas += c
+            logs += l
+            novos[row_num] = {k.strip().lower(): "" if v is None else str(v) for k, v in updates.items()}
+            novos[row_num].update(id=task_id, ultima_atualizacao=agora, versao=versao)
+            gravadas.append(task_id)
+        if versoes:
+            if celulas:
+                self.sheet.batch_update(celulas, value_input_option="USER_ENTERED")
+            # RAW, como no append_row: um id só de dígitos ("12345678:3") viraria hora/duração
+            self.sheet.batch_update(versoes, value_input_option="RAW")
+            self.registrar_logs(logs)
+            self._aplicar_no_cache(novos)
+        return gravadas, conflitos
+
+    def _reler_conflitos(self, bases: dict, conflitos: list) -> dict:
+        """Relê as linhas em conflito, esperando (ESPERAS_CAS) enquanto a versão tiver o "*"
+        de uma gravação cujos campos ainda não chegaram."""
+        relidas = self._ler_linhas_conferidas({i: bases[i][0] for i in conflitos})
+        linhas = {i: row_num for i, (row_num, _) in relidas.items()}
+        for espera in self.ESPERAS_CAS:
+            pendentes = {i: linhas[i] for i, (_, atual) in relidas.items() if str(atual.get("versao", "")).endswith("*")}
+            if not pendentes:
+                break
+            time.sleep(espera)
+            relidas.update(self._ler_linhas(pendentes))
+        return relidas
+
+    def _atualizar_versionado(self, task_ids: list, updates: dict, usuario: str, versao=None,
+                              sobrescrever: bool = False) -> list:
+        """Grava `updates` nas tarefas com compare-and-set; retorna os ids gravados.
+
+        Sem `versao`, um conflito relê só a linha e tenta de novo se os campos alterados
+        continuam como estavam no cache (outra pessoa mexeu em outros campos); se algum
+        deles mudou, a tarefa fica de fora, a menos que `sobrescrever`. Com `versao` (a
+        que o usuário viu), qualquer mudança desde então é conflito.
+
+        Limite: se os campos do vencedor demoram mais que ESPERAS_CAS para chegar (ou ele
+        caiu entre a troca e o batch_update), a nova tentativa parte da versão com "*" e o
+        batch_update atrasado, se vier, ainda pode sobrescrever os mesmos campos.
+        """
+        headers = self.headers()
+        task_ids = list(dict.fromkeys(task_ids))
+        if "id" not in headers or not task_ids:
+            return []
+        self._coluna_versao()
+        campos = [c for c in dict.fromkeys(k.strip().lower() for k in updates) if c in self.headers()]
+        bases = self._bases(task_ids, campos)
+        if versao:
+            bases = {i: b for i, b in bases.items() if numero_versao(b[1].get("versao")) == int(versao)}
+        gravadas, conflitos = [], []
+        for _ in range(self.TENTATIVAS_CAS):
+            if not bases:
+                break
+            ok, conflitos = self._gravar_versionado(bases, updates, usuario)
+            gravadas += ok
+            if not conflitos or versao:
+                break
+            relidas = self._reler_conflitos(bases, conflitos)
+            bases = {
+                i: (row_num, atual) for i, (row_num, atual) in relidas.items()
+                if sobrescrever or all(str(atual.get(c, "")) == str(bases[i][1].get(c, "")) for c in campos)
+            }
+        if conflitos:
+            self.invalidar_cache()  # quem perdeu o conflito passa a ver a versão atual
+        for task_id in gravadas:
+            self._indexar(task_id, updates)
+        return [i for i in task_ids if i in gravadas]
+
+    def atualizar_tarefas(self, task_ids: list, updates: dict, usuario: str = "Sistema",
+                          sobrescrever: bool = False) -> list:
+        """Lote: bases do cache, versões reivindicadas num único batchUpdate, todas as
+        células num único batch_update e todos os logs num único append.
+
+        `sobrescrever` (réplica do SQLite, que é a fonte da verdade): um conflito é
+        refeito sobre a versão relida mesmo que os mesmos campos tenham mudado.
+        """
+        return self._atualizar_versionado(task_ids, updates, usuario, sobrescrever=sobrescrever)
+
+    def append_row_with_history(self, tarefa, autor: str, historico: str):
+        """Adiciona nova linha conforme a ordem oficial de colunas."""
+        self._coluna_versao()
+        tarefa.historico, tarefa.autor = historico or "", autor
+        nova_linha = tarefa.to_linha()
+        resposta = self.sheet.append_row(nova_linha)
+        self.registrar_linhas_anexadas([tarefa.id], resposta)
+        self.invalidar_cache()
+        self._indexar(tarefa.id, {"titulo": tarefa.titulo, "historico": historico}, autor=autor)
+        # log de criação
+        self.registrar_log(autor, tarefa.id, "criação", "", f"Tarefa '{tarefa.titulo}' criada")
+
+    # interface TarefasStorage (por id)
+    def adicionar_tarefa(self, tarefa, autor: str, historico: str = ""):
+        self.append_row_with_history(tarefa, autor, historico)
+
+    def adicionar_tarefas(self, tarefas: list, autor: str, historicos: list = None, bloco: int = 500) -> int:
+        """Importação em lote: um append_rows (e um lote de logs) a cada `bloco` tarefas."""
+        historicos = historicos or [""] * len(tarefas)
+        if tarefas:
+            self._coluna_versao()
+        for inicio in range(0, len(tarefas), bloco):
+            lote = tarefas[inicio:inicio + bloco]
+            for tarefa, historico in zip(lote, historicos[inicio:inicio + bloco]):
+                tarefa.historico, tarefa.autor = historico or "", autor
+            linhas = [t.to_linha() for t in lote]
+            resposta = self.sheet.append_rows(linhas)
+            self.registrar_linhas_anexadas([t.id for t in lote], resposta)
+            self.registrar_logs([(autor, t.id, "criação", "", f"Tarefa '{t.titulo}' criada") for t in lote])
+        for tarefa, historico in zip(tarefas, historicos):
+            self._indexar(tarefa.id, {"titulo": tarefa.titulo, "historico": historico}, autor=autor)
+        if tarefas:
+            self.invalidar_cache()
+        return len(tarefas)
+
+    def atualizar_tarefa(self, task_id: str, updates: dict, usuario: str = "Sistema", versao: int = None) -> bool:
+        """Sem leitura prévia quando a tarefa está no cache: uma troca de versão e um batch_update."""
+        return bool(self._atualizar_versionado([task_id], updates, usuario, versao))
+
+    def adicionar_nota(self, task_id: str, usuario: str, nota: str, acao: str = "") -> bool:
+        """Um único append na aba 'Notas' (e um log) com apenas a linha nova."""
+        data_hora, linha = self.formatar_nota(usuario, nota, acao)
+        self._notas_sheet().append_row([task_id, data_hora, usuario, linha])
+        self.registrar_log(usuario, task_id, "historico", "", linha)
+        self._indexar_nota(task_id, linha)
+        with self._lock_notas:
+            self._notas_expira = 0.0  # a próxima leitura busca só as linhas novas
+        return True
+
+    def adicionar_notas(self, task_ids: list, usuario: str, nota: str, acao: str = "") -> list:
+        """A mesma nota para várias tarefas: um único append_rows em 'Notas' e um único lote de logs."""
+        task_ids = list(dict.fromkeys(task_ids))
+        if not task_ids:
+            return []
+        data_hora, linha = self.formatar_nota(usuario, nota, acao)
+        self._notas_sheet().append_rows([[i, data_hora, usuario, linha] for i in task_ids])
+        self.registrar_logs([(usuario, i, "historico", "", linha) for i in task_ids])
+        for task_id in task_ids:
+            self._indexar_nota(task_id, linha)
+        with self._lock_notas:
+            self._notas_expira = 0.0
+        return task_ids
+
+    # -----------------------------
+    # Notas (append-only)
+    # -----------------------------
+    def _notas_sheet(self):
+        """Aba 'Notas' (cria se não existir)."""
+        return self._aba("Notas", "100", "4", self.COLUNAS_NOTA)
+
+    def carregar_notas(self) -> dict:
+        """Notas por tarefa; após a primeira carga, lê só as linhas anexadas desde a última."""
+        with self._lock_notas:
+            if self._notas is None or time.monotonic() >= self._notas_expira:
+                novas = self._notas_sheet().get(f"A{self._n_notas + 2}:D")
+                notas = self._notas if self._notas is not None else {}
+                for linha in novas:
+                    linha = list(linha) + [""] * (4 - len(linha))
+                    notas.setdefault(linha[0], []).append(linha[3])
+                self._notas = notas
+                self._n_notas += len(novas)
+                self._notas_expira = time.monotonic() + self.ttl_cache
+            return self._notas
+
+    # -----------------------------
+    # Logs particionados por mês
+    # -----------------------------
+    # Cada mês vai para a aba 'Logs_AAAA_MM'; a aba 'Logs_indice' guarda, por
+    # partição, o nº de linhas e os usuários presentes. A antiga aba 'Logs', se
+    # existir, entra no índice como a partição mais antiga ('0000_00').
+    COLUNAS_INDICE_LOG = ["aba", "mes", "linhas", "usuarios"]
+    BLOCO_LOGS_FILTRADOS = 5000  # linhas por leitura na paginação com filtro (como iterar_logs)
+    MES_LEGADO = "0000_00"
+
+    @staticmethod
+    def _mes_do_log(linha: list) -> str:
+        data_hora = linha[0]  # dd/mm/AAAA HH:MM:SS
+        return f"{data_hora[6:10]}_{data_hora[3:5]}"
+
+    def _aba(self, titulo: str, linhas: str = "1000", colunas: str = "6", cabecalho: list = None):
+        """Aba `titulo` envolvida no WorksheetClient (cria com `cabecalho` se não existir)."""
+        if titulo in self._abas:
+            return self._abas[titulo]
+        planilha = self.sheet.spreadsheet
+        try:
+            aba = WorksheetClient(self.sheet.chamar(planilha.worksheet, titulo, idempotente=True), self.limitador)
+        except gspread.exceptions.WorksheetNotFound:
+            if cabecalho is None:
+                return None
+            aba = WorksheetClient(self.sheet.chamar(planilha.add_worksheet, title=titulo, rows=linhas, cols=colunas), self.limitador)
+            aba.append_row(cabecalho)
+        self._abas[titulo] = aba
+        return aba
+
+    def _indice_logs(self):
+        return self._aba("Logs_indice", "100", "4", self.COLUNAS_INDICE_LOG)
+
+    def _carregar_particoes(self, recarregar: bool = False) -> dict:
+        """Índice de partições, mantido em memória a cada gravação.
+
+        Outras instâncias também gravam logs: o índice é relido após `ttl_cache`
+        ou com `recarregar`, e funde-se ao que está em memória (as contagens só
+        crescem), para não perder o que esta instância acabou de registrar.
+        """
+        with self._lock_particoes:
+            if self._particoes is not None and not recarregar and time.monotonic() < self._particoes_expira:
+                return self._particoes
+            indice = self._indice_logs()
+            valores = indice.get_all_values()
+            lidas = {}
+            for n, (aba, mes, linhas, usuarios) in enumerate((list(v) + [""] * 4)[:4] for v in valores[1:]):
+                lidas[mes] = {
+                    "aba": aba, "linhas": int(linhas or 0), "linha_indice": n + 2,
+                    "usuarios": None if usuarios == "*" else set(filter(None, usuarios.split("|"))),
+                }
+            self._particoes_expira = time.monotonic() + self.ttl_cache
+            if self._particoes is not None:
+                for mes, lida in lidas.items():
+                    p = self._particoes.setdefault(mes, lida)
+                    if p is lida:
+                        continue
+                    p["linhas"] = max(p["linhas"], lida["linhas"])
+                    p["linha_indice"] = lida["linha_indice"]
+                    if p["usuarios"] is not None:
+                        p["usuarios"] = None if lida["usuarios"] is None else p["usuarios"] | lida["usuarios"]
+                return self._particoes
+            if len(valores) <= 1:
+                legado = self._aba("Logs")
+                if legado is not None:
+                    usuarios_legado = legado.col_values(2)[1:]
+                    n = max(len(legado.col_values(1)) - 1, 0)
+                    usuarios = set(filter(None, usuarios_legado))
+                    indice.append_row(["Logs", self.MES_LEGADO, n, "|".join(sorted(usuarios))])
+                    lidas[self.MES_LEGADO] = {"aba": "Logs", "linhas": n, "usuarios": usuarios, "linha_indice": 2}
+            self._particoes = lidas
+            return lidas
+
+    def _aba_log(self, mes: str):
+        particoes = self._carregar_particoes()
+        titulo = particoes[mes]["aba"] if mes in particoes else f"Logs_{mes}"
+        return self._aba(titulo, cabecalho=self.COLUNAS_LOG)
+
+    def _registrar_particao(self, mes: str, linhas: list, resposta: dict):
+        """Atualiza o índice após um append: nº de linhas (da resposta) e usuários."""
+        particoes = self._carregar_particoes()
+        faixa = resposta["updates"]["updatedRange"].split("!")[-1]
+        total = a1_to_rowcol(faixa.split(":")[-1])[0] - 1
+        usuarios = {l[1] for l in linhas}
+        indice = self._indice_logs()
+        with self._lock_particoes:
+            p = particoes.get(mes)
+            if p is None:
+                p = particoes[mes] = {"aba": f"Logs_{mes}", "linhas": total, "usuarios": usuarios,
+                                      "linha_indice": 2 + len(particoes)}
+                indice.append_row([p["aba"], mes, total, "|".join(sorted(usuarios))])
+                return
+            p["linhas"] = max(p["linhas"], total)
+            celulas = [{"range": f"C{p['linha_indice']}", "values": [[p["linhas"]]]}]
+            if p["usuarios"] is not None and not usuarios <= p["usuarios"]:
+                p["usuarios"] |= usuarios
+                celulas.append({"range": f"D{p['linha_indice']}", "values": [["|".join(sorted(p["usuarios"]))]]})
+        indice.batch_update(celulas)
+
+    def _particoes_em_ordem(self) -> list:
+        return [dict(p, mes=m) for m, p in sorted(self._carregar_particoes().items())]
+
+    def usuarios_nos_logs(self) -> list:
+        usuarios = set()
+        for p in self._carregar_particoes().values():
+            usuarios |= p["usuarios"] or set()
+        return sorted(usuarios)
+
+    def carregar_logs(self) -> pd.DataFrame:
+        self.logs.flush()  # garante que os logs enfileirados apareçam
+        partes = [pd.DataFrame(self._aba(p["aba"]).get_all_records()) for p in self._particoes_em_ordem()]
+        return pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
+
+    def iterar_logs(self, posicao: int = 0, bloco: int = 5000):
+        """Lê os logs a partir da `posicao`-ésima linha (partições em ordem cronológica), em blocos."""
+        self.logs.flush()
+        for p in self._particoes_em_ordem():
+            if posicao >= p["linhas"]:
+                posicao -= p["linhas"]
+                continue
+            aba = self._aba(p["aba"])
+            inicio = posicao + 2
+            while inicio <= p["linhas"] + 1:
+                fim = min(inicio + bloco - 1, p["linhas"] + 1)
+                linhas = aba.get(f"A{inicio}:F{fim}")
+                linhas = [list(l) + [""] * (6 - len(l)) for l in linhas]
+                linhas += [[""] * 6] * (fim - inicio + 1 - len(linhas))
+                yield linhas
+                inicio = fim + 1
+            posicao = 0
+
+    def pagina_de_logs(self, cursor=None, tamanho: int = 100, usuario: str = None, id_contem: str = None):
+        """Página de logs do mais novo para o mais antigo, lida por faixas a partir do fim.
+
+        Só visita as partições que podem conter o `usuario` e, com `id_contem`,
+        só as de meses a partir da criação das tarefas correspondentes. Retorna
+        (DataFrame, cursor da próxima página ou None). Com filtro, cada leitura cobre
+        BLOCO_LOGS_FILTRADOS linhas e a busca para assim que a página enche.
+        """
+        if cursor is None:
+            # primeira página: inclui o que outras instâncias gravaram desde a última leitura
+            self.logs.flush()
+            self._carregar_particoes(recarregar=True)
+        particoes = self._particoes_em_ordem()
+        if usuario:
+            particoes = [p for p in particoes if p["usuarios"] is None or usuario in p["usuarios"]]
+        if id_contem:
+            tarefas = self.carregar_tarefas(columns=["id", "data_criacao"])
+            meses = tarefas.loc[
+                tarefas["id"].astype(str).str.contains(id_contem, case=False, regex=False), "data_criacao_dt"
+            ].dropna()
+            if not meses.empty:
+                desde = meses.min().strftime("%Y_%m")
+                particoes = [p for p in particoes if p["mes"] == self.MES_LEGADO or p["mes"] >= desde]
+        particoes = particoes[::-1]
+
+        # o cursor guarda o mês (não a posição na lista): uma partição nova entre
+        # uma página e outra não desloca a leitura
+        mes, fim = cursor or (None, None)
+        idx = 0 if cursor is None else next((i for i, p in enumerate(particoes) if p["mes"] == mes), len(particoes))
+        # com filtro, poucas linhas de cada faixa entram na página: lê faixas grandes
+        passo = max(tamanho, self.BLOCO_LOGS_FILTRADOS) if usuario or id_contem else tamanho
+        resultado = []
+        while idx < len(particoes) and len(resultado) < tamanho:
+            p = particoes[idx]
+            fim = p["linhas"] + 1 if fim is None else fim
+            if fim < 2:
+                idx, fim = idx + 1, None
+                continue
+            inicio = max(2, fim - passo + 1)
+            bloco = self._aba(p["aba"]).get(f"A{inicio}:F{fim}")
+            bloco = [list(l) + [""] * (6 - len(l)) for l in bloco]
+            bloco += [[""] * 6] * (fim - inicio + 1 - len(bloco))
+            for num, linha in reversed(list(enumerate(bloco, start=inicio))):
+                fim = num - 1
+                if usuario and linha[1] != usuario:
+                    continue
+                if id_contem and id_contem.lower() not in linha[2].lower():
+                    continue
+                if any(linha):
+                    resultado.append(linha)
+                if len(resultado) >= tamanho:
+                    break
+        proximo = None if idx >= len(particoes) else (particoes[idx]["mes"], fim)
+        return pd.DataFrame(resultado, columns=self.COLUNAS_LOG), proximo
 
     def registrar_log(self, usuario: str, id_tarefa: str, campo: str, valor_antigo: str, valor_novo: str):
         """Adiciona linha em 'Logs' (cria se não existir)."""
-        try:
-            log_sheet = self.sheet.spreadsheet.worksheet("Logs")
-        except Exception:
-            log_sheet = self.sheet.spreadsheet.add_worksheet(title="Logs", rows="100", cols="10")
-            log_sheet.append_row(["data_hora", "usuario", "id_tarefa", "campo", "valor_antigo", "valor_novo"])
-
-        log_entry = [
-            datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
-            usuario,
-            id_tarefa,
-            campo,
-            valor_antigo or "",
-            valor_novo or ""
+        self.registrar_logs([(usuario, id_tarefa, campo, valor_antigo, valor_novo)])
+
+    def registrar_logs(self, entradas: list):
+        """Enfileira várias linhas para 'Logs'; o LogBuffer as grava com append_rows.
+
+        Cada entrada é uma tupla (usuario, id_tarefa, campo, valor_antigo, valor_novo).
+        """
+        if not entradas:
+            return
+        data_hora = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+        linhas = [
+            [data_hora, usuario, id_tarefa, campo, valor_antigo or "", valor_novo or ""]
+            for usuario, id_tarefa, campo, valor_antigo, valor_novo in entradas
         ]
-        log_sheet.append_row(log_entry)
+        self.logs.adicionar(linhas)
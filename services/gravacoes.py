@@ -0,0 +1,39 @@
+import threading
+from concurrent.futures import wait
+
+
+class GravacoesOrdenadas:
+    """Executor compartilhado que preserva a ordem das gravações de cada tarefa.
+
+    Gravações de tarefas diferentes (de qualquer sessão) rodam em paralelo no
+    pool; uma gravação só começa depois das anteriores que tocam as mesmas
+    tarefas. Como o pool tira da fila em ordem de chegada, a anterior já está
+    rodando (ou terminou) quando a seguinte passa a esperá-la.
+    """
+
+    def __init__(self, executor):
+        self._executor = executor
+        self._lock = threading.Lock()
+        self._ultimas = {}  # id da tarefa -> Future da última gravação enviada
+
+    def enviar(self, task_ids, funcao, *args):
+        """Agenda `funcao(*args)` após as gravações pendentes de `task_ids`; retorna o Future."""
+        task_ids = tuple(task_ids)
+        with self._lock:
+            anteriores = {self._ultimas[i] for i in task_ids if i in self._ultimas}
+            futuro = self._executor.submit(self._executar, anteriores, funcao, args)
+            for task_id in task_ids:
+                self._ultimas[task_id] = futuro
+        futuro.add_done_callback(lambda f: self._liberar(task_ids, f))
+        return futuro
+
+    @staticmethod
+    def _executar(anteriores, funcao, args):
+        wait(anteriores)
+        return funcao(*args)
+
+    def _liberar(self, task_ids, futuro):
+        with self._lock:
+            for task_id in task_ids:
+                if self._ultimas.get(task_id) is futuro:
+                    del self._ultimas[task_id]
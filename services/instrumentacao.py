@@ -0,0 +1,105 @@
+import json
+import threading
+import time
+
+# Execução (rerun) corrente por thread; threads de fundo não têm execução e só vão para o trace.
+_local = threading.local()
+_lock_trace = threading.Lock()
+_arquivo_trace = None
+
+
+class Execucao:
+    """Chamadas à API feitas durante uma execução do script."""
+
+    def __init__(self, pagina: str = ""):
+        self.pagina = pagina
+        self.chamadas = []
+        self.exibida = False
+
+    def herdar(self, anterior: "Execucao"):
+        """Inclui chamadas de uma execução interrompida por st.rerun() (ex.: clique em botão)."""
+        self.chamadas[:0] = [dict(c, interrompida=True) for c in anterior.chamadas]
+
+    def totais(self) -> dict:
+        return {
+            "chamadas": len(self.chamadas),
+            "duracao_ms": round(sum(c["duracao_ms"] for c in self.chamadas), 1),
+            "bytes": sum(c["bytes"] for c in self.chamadas),
+        }
+
+
+def configurar(arquivo_trace: str = None):
+    """Ativa (ou desativa, com None) o trace JSONL de todas as chamadas."""
+    global _arquivo_trace
+    _arquivo_trace = arquivo_trace
+
+
+def iniciar_execucao(pagina: str = "") -> Execucao:
+    _local.execucao = Execucao(pagina)
+    return _local.execucao
+
+
+def execucao_atual():
+    return getattr(_local, "execucao", None)
+
+
+def ativa() -> bool:
+    """Há quem consuma o registro (a execução corrente desta thread ou o trace)?"""
+    return execucao_atual() is not None or bool(_arquivo_trace)
+
+
+def tamanho(obj) -> int:
+    """Tamanho aproximado do payload enviado/recebido: soma dos caracteres das células.
+
+    Não serializa nada; numa leitura de 50k linhas custa uma passada pelos valores.
+    """
+    if obj is None:
+        return 0
+    if isinstance(obj, (str, bytes)):
+        return len(obj)
+    if isinstance(obj, dict):
+        return sum(tamanho(k) + tamanho(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        if obj and isinstance(obj[0], str):
+            try:
+                return sum(map(len, obj))  # linha de células: caminho rápido
+            except TypeError:
+                pass
+        return sum(tamanho(x) for x in obj)
+    return len(str(obj))
+
+
+def descrever_faixa(args: tuple, kwargs: dict) -> str:
+    alvo = kwargs.get("range_name") or kwargs.get("ranges") or kwargs.get("data") or (args[0] if args else "")
+    if isinstance(alvo, str):
+        return alvo
+    if isinstance(alvo, (list, tuple)) and alvo:
+        if all(isinstance(a, str) for a in alvo):
+            return ",".join(alvo)
+        if all(isinstance(a, dict) and "range" in a for a in alvo):
+            return ",".join(a["range"] for a in alvo)
+    if len(args) >= 2 and all(isinstance(a, int) for a in args[:2]):
+        return f"R{args[0]}C{args[1]}"
+    if isinstance(alvo, int):
+        return str(alvo)
+    return ""
+
+
+def registrar(aba: str, tipo: str, faixa: str, bytes_: int, duracao: float, erro: str = ""):
+    execucao = execucao_atual()
+    item = {
+        "ts": round(time.time(), 3),
+        "pagina": execucao.pagina if execucao else "",
+        "thread": threading.current_thread().name,
+        "aba": aba,
+        "tipo": tipo,
+        "faixa": faixa,
+        "bytes": bytes_,
+        "duracao_ms": round(duracao * 1000, 1),
+        "erro": erro,
+    }
+    if execucao is not None:
+        execucao.chamadas.append(item)
+    if _arquivo_trace:
+        with _lock_trace, open(_arquivo_trace, "a", encoding="utf-8") as f:
+            f.write(json.dumps(item, ensure_ascii=False) + "\n")
@@ -0,0 +1,151 @@
+import copy
+import random
+import threading
+import time
+
+from services import instrumentacao
+
+
+class LimitadorCota:
+    """Token bucket dimensionado pela cota da API (`por_minuto` chamadas por minuto)."""
+
+    def __init__(self, por_minuto: int = 60, capacidade: int = None):
+        self.taxa = por_minuto / 60.0
+        self.capacidade = capacidade or por_minuto
+        self._tokens = float(self.capacidade)
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def adquirir(self):
+        """Bloqueia até haver um token disponível."""
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                self._tokens = min(self.capacidade, self._tokens + (agora - self._ultimo) * self.taxa)
+                self._ultimo = agora
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                espera = (1 - self._tokens) / self.taxa
+            time.sleep(espera)
+
+
+class _Voo:
+    """Leitura em andamento compartilhada entre chamadas idênticas."""
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.erro = None
+        self.seguidores = 0
+
+
+class WorksheetClient:
+    """Envelope de um gspread.Worksheet com cota, retry/backoff e coalescência de leituras.
+
+    Toda chamada passa pelo `limitador`; erros 429 são repetidos com backoff
+    exponencial e jitter, e 5xx só em chamadas idempotentes (um append ou um
+    findReplace que o servidor aplicou antes de falhar seria duplicado). Leituras idênticas simultâneas (ex.: várias sessões
+    abrindo o Kanban) viram uma única requisição. Cada tentativa é registrada em
+    `services.instrumentacao` (tipo, faixa, bytes e duração). Aceita qualquer
+    objeto com a interface de Worksheet, inclusive falsos em testes.
+    """
+
+    LEITURAS = {"get_all_values", "get_all_records", "get_values", "get", "batch_get",
+                "row_values", "col_values", "cell", "acell"}
+    # escritas em faixas fixas: repetir dá o mesmo resultado
+    IDEMPOTENTES = LEITURAS | {"update", "batch_update", "update_cell", "update_cells", "clear"}
+    CODIGOS_RETENTAVEIS = {429, 500, 502, 503}
+
+    def __init__(self, worksheet, limitador: LimitadorCota = None, tentativas: int = 6,
+                 espera_base: float = 1.0, espera_max: float = 32.0):
+        self._ws = worksheet
+        self.limitador = limitador or LimitadorCota()
+        self.tentativas = tentativas
+        self.espera_base = espera_base
+        self.espera_max = espera_max
+        self._em_voo = {}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, nome):
+        attr = getattr(self._ws, nome)
+        if not callable(attr):
+            return attr
+        if nome in self.LEITURAS:
+            return lambda *args, **kwargs: self._coalescer(nome, attr, args, kwargs)
+        return lambda *args, **kwargs: self.chamar(attr, *args, **kwargs)
+
+    @classmethod
+    def _status(cls, erro) -> int:
+        resposta = getattr(erro, "response", None)
+        return getattr(resposta, "status_code", None) or getattr(erro, "code", None)
+
+    def chamar(self, func, *args, idempotente: bool = None, **kwargs):
+        """Executa `func` respeitando a cota e repetindo erros de cota/servidor.
+
+        `idempotente` (padrão: pelo nome, ver IDEMPOTENTES) decide se 5xx é repetido;
+        429 é sempre repetido, pois a chamada foi recusada antes de ser aplicada.
+        """
+        nome = getattr(func, "__name__", str(func))
+        if idempotente is None:
+            idempotente = nome in self.IDEMPOTENTES
+        retentaveis = self.CODIGOS_RETENTAVEIS if idempotente else {429}
+        for tentativa in range(self.tentativas):
+            self.limitador.adquirir()
+            inicio = time.perf_counter()
+            try:
+                resultado = func(*args, **kwargs)
+            except Exception as e:
+                self._registrar(nome, args, kwargs, None, inicio, erro=str(self._status(e) or type(e).__name__))
+                if self._status(e) not in retentaveis or tentativa == self.tentativas - 1:
+                    raise
+                espera = min(self.espera_max, self.espera_base * 2 ** tentativa)
+                time.sleep(random.uniform(0, espera))  # full jitter
+            else:
+                self._registrar(nome, args, kwargs, resultado, inicio)
+                return resultado
+
+    def _registrar(self, nome, args, kwargs, resultado, inicio, erro=""):
+        duracao = time.perf_counter() - inicio
+        if not instrumentacao.ativa():
+            return  # thread de fundo sem trace: ninguém lê o registro
+        leitura = nome in self.LEITURAS
+        payload = resultado if leitura else (args, kwargs)
+        instrumentacao.registrar(
+            getattr(self._ws, "title", ""), nome, instrumentacao.descrever_faixa(args, kwargs),
+            instrumentacao.tamanho(payload), duracao, erro
+        )
+
+    def _coalescer(self, nome, func, args, kwargs):
+        chave = (nome, repr(args), repr(sorted(kwargs.items())))
+        with self._lock:
+            voo = self._em_voo.get(chave)
+            lider = voo is None
+            if lider:
+                voo = self._em_voo[chave] = _Voo()
+            else:
+                voo.seguidores += 1
+        if not lider:
+            inicio = time.perf_counter()
+            voo.evento.wait()
+            instrumentacao.registrar(getattr(self._ws, "title", ""), f"{nome} (coalescida)",
+                                     instrumentacao.descrever_faixa(args, kwargs), 0, time.perf_counter() - inicio)
+            if voo.erro is not None:
+                raise voo.erro
+            return copy.deepcopy(voo.resultado)
+
+        resultado = None
+        try:
+            resultado = self.chamar(func, *args, **kwargs)
+            return resultado
+        except Exception as e:
+            voo.erro = e
+            raise
+        finally:
+            with self._lock:
+                del self._em_voo[chave]
+                seguidores = voo.seguidores
+            if seguidores:
+                # cópia própria para os seguidores; o líder fica com o original
+                voo.resultado = copy.deepcopy(resultado)
+            voo.evento.set()
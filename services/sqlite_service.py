@@ -0,0 +1,415 @@
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from models.tarefa import normalizar_autor, numero_versao, proxima_versao, tipar
+from services.sheets_client import WorksheetClient
+from services.storage import TarefasStorage
+
+
+class SQLiteService(TarefasStorage):
+    """Armazenamento local em SQLite; a planilha, se informada, vira réplica assíncrona.
+
+    Leituras e escritas das páginas são atendidas pelo banco local. Cada escrita é
+    repetida em segundo plano no `replica` (um GoogleSheetsService), que mantém a
+    ordem de colunas de `Tarefa.to_linha` e a aba 'Logs'. Sem réplica, funciona
+    sozinho (ex.: `SQLiteService(":memory:")` em testes).
+    """
+
+    def __init__(self, caminho: str = "tarefas.db", replica=None, tentativas: int = 5):
+        self.conn = sqlite3.connect(caminho, check_same_thread=False)
+        # mesma normalização do app (Unicode), usada no índice por autor
+        self.conn.create_function("normalizar_autor", 1, normalizar_autor, deterministic=True)
+        self._lock = threading.Lock()
+        self._criar_tabelas()
+        self.replica = replica
+        self.tentativas = tentativas
+        self._fila = queue.Queue()
+        if replica is not None:
+            if self._vazio():
+                self.importar_da_replica()
+            self._thread = threading.Thread(target=self._replicar, name="sqlite-replica", daemon=True)
+            self._thread.start()
+
+    PADROES = {"versao": "'1'"}  # valor de colunas novas em bancos já existentes
+    TENTATIVAS_CAS = 3
+
+    def _criar_tabelas(self):
+        definicoes = {c: f"{c} TEXT DEFAULT " + self.PADROES.get(c, "''") for c in self.COLUNAS}
+        definicoes["id"] = "id TEXT PRIMARY KEY"
+        colunas_log = ", ".join(f"{c} TEXT" for c in self.COLUNAS_LOG)
+        with self._lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(f"CREATE TABLE IF NOT EXISTS tarefas ({', '.join(definicoes.values())})")
+            existentes = {r[1] for r in self.conn.execute("PRAGMA table_info(tarefas)")}
+            for c in self.COLUNAS:
+                if c not in existentes:
+                    self.conn.execute(f"ALTER TABLE tarefas ADD COLUMN {definicoes[c]}")
+            for c in ["autor", "status", "prazo"]:
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_tarefas_{c} ON tarefas({c})")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_tarefas_autor_norm ON tarefas(normalizar_autor(autor))")
+            self.conn.execute(f"CREATE TABLE IF NOT EXISTS logs ({colunas_log})")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_logs_id_tarefa ON logs(id_tarefa)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_logs_usuario ON logs(usuario)")
+            colunas_nota = ", ".join(f"{c} TEXT" for c in self.COLUNAS_NOTA)
+            self.conn.execute(f"CREATE TABLE IF NOT EXISTS notas ({colunas_nota})")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_notas_id_tarefa ON notas(id_tarefa)")
+
+    def _vazio(self) -> bool:
+        with self._lock:
+            return self.conn.execute("SELECT 1 FROM tarefas LIMIT 1").fetchone() is None
+
+    def importar_da_replica(self):
+        """Carga inicial do banco a partir da planilha (tarefas, notas e logs)."""
+        # linhas cruas (na ordem de COLUNAS): a 'versao' "<id>:<n>" é a que a réplica confere
+        linhas = [
+            tuple("" if v is None else str(v) for v in r)
+            for bloco in self.replica.iterar_tarefas() for r in bloco if str(r[0]).strip()
+        ]
+        try:
+            logs = self.replica.carregar_logs()
+            linhas_log = [
+                tuple("" if v is None else str(v) for v in r)
+                for r in logs.reindex(columns=self.COLUNAS_LOG, fill_value="").itertuples(index=False)
+            ]
+        except Exception as e:
+            print(f"Erro ao importar logs: {e}")
+            linhas_log = []
+        # a réplica só guarda a linha formatada; data_hora/usuario não são necessários para materializar
+        linhas_nota = [(i, "", "", t) for i, textos in self.replica.carregar_notas().items() for t in textos]
+        marcas = ", ".join("?" * len(self.COLUNAS))
+        marcas_log = ", ".join("?" * len(self.COLUNAS_LOG))
+        with self._lock, self.conn:
+            self.conn.executemany(f"INSERT OR IGNORE INTO tarefas ({', '.join(self.COLUNAS)}) VALUES ({marcas})", linhas)
+            self.conn.executemany("INSERT INTO notas VALUES (?, ?, ?, ?)", linhas_nota)
+            self.conn.executemany(f"INSERT INTO logs VALUES ({marcas_log})", linhas_log)
+
+    # -----------------------------
+    # Leituras
+    # -----------------------------
+    def carregar_tarefas(self, columns=None, autor: str = None) -> pd.DataFrame:
+        pedidas = list(columns) if columns else list(self.COLUNAS)
+        existentes = [c for c in pedidas if c in self.COLUNAS] or ["id"]
+        filtro, parametros = "", []
+        if autor is not None:
+            filtro, parametros = "WHERE normalizar_autor(autor) = ?", [normalizar_autor(autor)]
+        with self._lock:
+            df = pd.read_sql_query(
+                f"SELECT {', '.join(existentes)} FROM tarefas {filtro} ORDER BY rowid", self.conn, params=parametros
+            )
+        for c in pedidas:
+            if c not in df.columns:
+                df[c] = ""
+        return tipar(df[pedidas])
+
+    def iterar_tarefas(self, bloco: int = 5000):
+        ultimo = 0
+        while True:
+            with self._lock:
+                linhas = self.conn.execute(
+                    f"SELECT rowid, {', '.join(self.COLUNAS)} FROM tarefas WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                    (ultimo, bloco)
+                ).fetchall()
+            if not linhas:
+                return
+            ultimo = linhas[-1][0]
+            yield [["" if v is None else v for v in l[1:]] for l in linhas]
+            if len(linhas) < bloco:
+                return
+
+    def carregar_logs(self) -> pd.DataFrame:
+        with self._lock:
+            return pd.read_sql_query("SELECT * FROM logs ORDER BY rowid", self.conn)
+
+    def usuarios_nos_logs(self) -> list:
+        with self._lock:
+            return [u for (u,) in self.conn.execute("SELECT DISTINCT usuario FROM logs ORDER BY usuario")]
+
+    def pagina_de_logs(self, cursor=None, tamanho: int = 100, usuario: str = None, id_contem: str = None):
+        """Página do fim para o começo; o cursor é o rowid da última linha entregue."""
+        condicoes, params = [], []
+        if cursor is not None:
+            condicoes.append("rowid < ?")
+            params.append(cursor)
+        if usuario:
+            condicoes.append("usuario = ?")
+            params.append(usuario)
+        if id_contem:
+            condicoes.append("id_tarefa LIKE ?")
+            params.append(f"%{id_contem}%")
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        with self._lock:
+            linhas = self.conn.execute(
+                f"SELECT rowid, {', '.join(self.COLUNAS_LOG)} FROM logs {where} ORDER BY rowid DESC LIMIT ?",
+                params + [tamanho]
+            ).fetchall()
+        proximo = linhas[-1][0] if len(linhas) == tamanho else None
+        return pd.DataFrame([l[1:] for l in linhas], columns=self.COLUNAS_LOG), proximo
+
+    def iterar_logs(self, posicao: int = 0, bloco: int = 5000):
+        while True:
+            with self._lock:
+                linhas = self.conn.execute(
+                    f"SELECT {', '.join(self.COLUNAS_LOG)} FROM logs WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                    (posicao, bloco)
+                ).fetchall()
+            if not linhas:
+                return
+            yield [list(l) for l in linhas]
+            if len(linhas) < bloco:
+                return
+            posicao += len(linhas)
+
+    # -----------------------------
+    # Escritas (local + réplica em segundo plano)
+    # -----------------------------
+    def registrar_logs(self, entradas: list):
+        """Cada entrada é uma tupla (usuario, id_tarefa, campo, valor_antigo, valor_novo)."""
+        data_hora = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+        linhas = [(data_hora, u, i, c, a or "", n or "") for u, i, c, a, n in entradas]
+        with self._lock, self.conn:
+            self.conn.executemany("INSERT INTO logs VALUES (?, ?, ?, ?, ?, ?)", linhas)
+
+    def adicionar_tarefa(self, tarefa, autor: str, historico: str = ""):
+        tarefa.historico, tarefa.autor = historico or "", autor
+        valores = tarefa.to_linha()
+        marcas = ", ".join("?" * len(self.COLUNAS))
+        with self._lock, self.conn:
+            self.conn.execute(f"INSERT INTO tarefas ({', '.join(self.COLUNAS)}) VALUES ({marcas})", valores)
+        self.registrar_logs([(autor, tarefa.id, "criação", "", f"Tarefa '{tarefa.titulo}' criada")])
+        self._indexar(tarefa.id, {"titulo": tarefa.titulo, "historico": historico}, autor=autor)
+        self._enfileirar("adicionar_tarefa", tarefa, autor, historico)
+
+    def adicionar_tarefas(self, tarefas: list, autor: str, historicos: list = None) -> int:
+        historicos = historicos or [""] * len(tarefas)
+        for tarefa, historico in zip(tarefas, historicos):
+            tarefa.historico, tarefa.autor = historico or "", autor
+        marcas = ", ".join("?" * len(self.COLUNAS))
+        with self._lock, self.conn:
+            self.conn.executemany(
+                f"INSERT INTO tarefas ({', '.join(self.COLUNAS)}) VALUES ({marcas})", [t.to_linha() for t in tarefas]
+            )
+        self.registrar_logs([(autor, t.id, "criação", "", f"Tarefa '{t.titulo}' criada") for t in tarefas])
+        for tarefa, historico in zip(tarefas, historicos):
+            self._indexar(tarefa.id, {"titulo": tarefa.titulo, "historico": historico}, autor=autor)
+        self._enfileirar("adicionar_tarefas", tarefas, autor, historicos)
+        return len(tarefas)
+
+    def _linha(self, task_id: str):
+        with self._lock:
+            cur = self.conn.execute(f"SELECT {', '.join(self.COLUNAS)} FROM tarefas WHERE id = ?", (task_id,))
+            row = cur.fetchone()
+        return dict(zip(self.COLUNAS, row)) if row else None
+
+    def _alteracoes(self, task_id: str, antigo: dict, novos: dict, usuario: str, agora: str) -> tuple:
+        """(valores a gravar, logs) de uma linha: só os campos que mudam, mais carimbo e versão."""
+        valores, logs = {}, []
+        for c, novo in novos.items():
+            if str(antigo[c] or "") != novo:
+                valores[c] = novo
+                logs.append((usuario, task_id, c, antigo[c], novo))
+        valores["ultima_atualizacao"] = agora
+        valores["versao"] = proxima_versao(antigo["versao"], task_id)
+        logs.append((usuario, task_id, "ultima_atualizacao", antigo["ultima_atualizacao"], agora))
+        return valores, logs
+
+    def _novos(self, updates: dict) -> dict:
+        return {
+            k.strip().lower(): "" if v is None else str(v)
+            for k, v in updates.items() if k.strip().lower() in self.COLUNAS and k.strip().lower() not in ("id", "versao")
+        }
+
+    def atualizar_tarefa(self, task_id: str, updates: dict, usuario: str = "Sistema", versao: int = None) -> bool:
+        """UPDATE condicionado à versão lida (`WHERE versao = ?`): outro processo que grave
+        no mesmo banco entre a leitura e a escrita faz a tentativa falhar e ser refeita."""
+        novos = self._novos(updates)
+        visto = None
+        for _ in range(self.TENTATIVAS_CAS):
+            antigo = self._linha(task_id)
+            if antigo is None or (versao and numero_versao(antigo["versao"]) != int(versao)):
+                return False
+            if visto is not None and any(str(antigo[c] or "") != str(visto[c] or "") for c in novos):
+                return False  # outra gravação mexeu nos mesmos campos
+            visto = visto or antigo
+            valores, logs = self._alteracoes(task_id, antigo, novos, usuario, datetime.now().strftime(self.FORMATO_CARIMBO))
+            atribuicoes = ", ".join(f"{c} = ?" for c in valores)
+            with self._lock, self.conn:
+                cur = self.conn.execute(
+                    f"UPDATE tarefas SET {atribuicoes} WHERE id = ? AND versao = ?",
+                    list(valores.values()) + [task_id, antigo["versao"]]
+                )
+            if cur.rowcount:
+                break
+            if versao:
+                return False
+        else:
+            return False
+        self.registrar_logs(logs)
+        self._indexar(task_id, updates)
+        self._enfileirar("atualizar_tarefa", task_id, updates, usuario)
+        return True
+
+    def atualizar_tarefas(self, task_ids: list, updates: dict, usuario: str = "Sistema") -> list:
+        """Lote numa única transação, cada linha condicionada à versão lida; a réplica recebe
+        o lote (só as gravadas) de uma vez."""
+        task_ids = list(dict.fromkeys(task_ids))
+        novos = self._novos(updates)
+        antigos = {}
+        with self._lock:
+            for i in range(0, len(task_ids), 500):
+                lote = task_ids[i:i + 500]
+                cur = self.conn.execute(
+                    f"SELECT {', '.join(self.COLUNAS)} FROM tarefas WHERE id IN ({', '.join('?' * len(lote))})", lote
+                )
+                antigos.update((r[0], dict(zip(self.COLUNAS, r))) for r in cur)
+        if not antigos:
+            return []
+
+        agora = datetime.now().strftime(self.FORMATO_CARIMBO)
+        gravados, logs = [], []
+        with self._lock, self.conn:
+            for task_id in (i for i in task_ids if i in antigos):
+                antigo = antigos[task_id]
+                valores, l = self._alteracoes(task_id, antigo, novos, usuario, agora)
+                cur = self.conn.execute(
+                    f"UPDATE tarefas SET {', '.join(f'{c} = ?' for c in valores)} WHERE id = ? AND versao = ?",
+                    list(valores.values()) + [task_id, antigo["versao"]]
+                )
+                if cur.rowcount:
+                    gravados.append(task_id)
+                    logs += l
+        if not gravados:
+            return []
+        self.registrar_logs(logs)
+        for task_id in gravados:
+            self._indexar(task_id, updates)
+        self._enfileirar("atualizar_tarefas", gravados, updates, usuario)
+        return gravados
+
+    def adicionar_notas(self, task_ids: list, usuario: str, nota: str, acao: str = "") -> list:
+        task_ids = [i for i in dict.fromkeys(task_ids) if self._linha(i) is not None]
+        if not task_ids:
+            return []
+        data_hora, linha = self.formatar_nota(usuario, nota, acao)
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO notas VALUES (?, ?, ?, ?)", [(i, data_hora, usuario, linha) for i in task_ids]
+            )
+        self.registrar_logs([(usuario, i, "historico", "", linha) for i in task_ids])
+        for task_id in task_ids:
+            self._indexar_nota(task_id, linha)
+        self._enfileirar("adicionar_notas", task_ids, usuario, nota, acao)
+        return task_ids
+
+    def adicionar_nota(self, task_id: str, usuario: str, nota: str, acao: str = "") -> bool:
+        if self._linha(task_id) is None:
+            return False
+        data_hora, linha = self.formatar_nota(usuario, nota, acao)
+        with self._lock, self.conn:
+            self.conn.execute("INSERT INTO notas VALUES (?, ?, ?, ?)", (task_id, data_hora, usuario, linha))
+        self.registrar_logs([(usuario, task_id, "historico", "", linha)])
+        self._indexar_nota(task_id, linha)
+        self._enfileirar("adicionar_nota", task_id, usuario, nota, acao)
+        return True
+
+    # -----------------------------
+    # Notas
+    # -----------------------------
+    def _notas_de(self, ids: list) -> dict:
+        notas = {}
+        with self._lock:
+            for i in range(0, len(ids), 500):
+                lote = ids[i:i + 500]
+                cur = self.conn.execute(
+                    f"SELECT id_tarefa, texto FROM notas WHERE id_tarefa IN ({', '.join('?' * len(lote))}) ORDER BY rowid",
+                    lote
+                )
+                for id_tarefa, texto in cur:
+                    notas.setdefault(id_tarefa, []).append(texto)
+        return notas
+
+    def carregar_notas(self) -> dict:
+        notas = {}
+        with self._lock:
+            for id_tarefa, texto in self.conn.execute("SELECT id_tarefa, texto FROM notas ORDER BY rowid"):
+                notas.setdefault(id_tarefa, []).append(texto)
+        return notas
+
+    def historico_de(self, task_id: str, base: str = "") -> str:
+        return self._juntar(base, self._notas_de([task_id]).get(task_id, []))
+
+    def materializar_historico(self, df: pd.DataFrame) -> pd.DataFrame:
+        notas = self._notas_de([str(i) for i in df["id"]])
+        df = df.copy()
+        bases = df["historico"] if "historico" in df.columns else [""] * len(df)
+        df["historico"] = [self._juntar(b, notas.get(i, [])) for i, b in zip(df["id"], bases)]
+        return df
+
+    # -----------------------------
+    # Réplica
+    # -----------------------------
+    def _enfileirar(self, metodo: str, *args):
+        if self.replica is not None:
+            self._fila.put((metodo, args))
+
+    def _conferir_replica(self, metodo: str, args: tuple, resultado):
+        """A planilha recusa por conflito de versão o que outra instância mudou nos mesmos
+        campos; aqui o SQLite é a fonte da verdade, então as recusadas são regravadas por
+        cima da versão atual. O que ainda assim não for gravado é avisado como divergência."""
+        if metodo == "atualizar_tarefa":
+            task_id, updates, usuario = args
+            faltando = [] if resultado else [task_id]
+        else:
+            task_ids, updates, usuario = args
+            faltando = [i for i in task_ids if i not in set(resultado or [])]
+        if not faltando:
+            return
+        regravadas = self.replica.atualizar_tarefas(faltando, updates, usuario, sobrescrever=True)
+        divergentes = [i for i in faltando if i not in regravadas]
+        if divergentes:
+            print(f"ATENÇÃO: planilha divergente do SQLite; {updates} não replicado em {divergentes}")
+
+    def aguardar_replica(self):
+        """Bloqueia até a réplica aplicar todas as escritas pendentes."""
+        self._fila.join()
+
+    # appends sem id para conferir: uma nova tentativa só é segura após um 429 (recusado
+    # antes de ser aplicado); depois de um 5xx a nota pode já estar na planilha
+    SO_REPETIR_EM_COTA = {"adicionar_nota", "adicionar_notas"}
+
+    def _aplicar_na_replica(self, metodo: str, args: tuple, repeticao: bool = False):
+        if repeticao and metodo in ("adicionar_tarefa", "adicionar_tarefas"):
+            # a tentativa anterior pode ter anexado parte (ou todas) antes do erro: só as ausentes
+            if metodo == "adicionar_tarefa":
+                tarefas, autor, historicos = [args[0]], args[1], [args[2]]
+            else:
+                tarefas, autor, historicos = args[0], args[1], args[2] or [""] * len(args[0])
+            gravadas = self.replica.ids_gravados([t.id for t in tarefas])
+            pares = [(t, h) for t, h in zip(tarefas, historicos) if t.id not in gravadas]
+            if pares:
+                self.replica.adicionar_tarefas([t for t, _ in pares], autor, [h for _, h in pares])
+            return
+        resultado = getattr(self.replica, metodo)(*args)
+        if metodo in ("atualizar_tarefa", "atualizar_tarefas"):
+            self._conferir_replica(metodo, args, resultado)
+
+    def _replicar(self):
+        while True:
+            metodo, args = self._fila.get()
+            try:
+                for tentativa in range(self.tentativas):
+                    try:
+                        self._aplicar_na_replica(metodo, args, repeticao=tentativa > 0)
+                        break
+                    except Exception as e:
+                        print(f"Erro ao replicar {metodo} (tentativa {tentativa + 1}): {e}")
+                        if metodo in self.SO_REPETIR_EM_COTA and WorksheetClient._status(e) != 429:
+                            print(f"ATENÇÃO: {metodo}{args} pode não ter sido replicado; não repetido para não duplicar")
+                            break
+                        time.sleep(2 ** tentativa)
+            finally:
+                self._fila.task_done()
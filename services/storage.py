@@ -0,0 +1,226 @@
+import csv
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from models import tarefa as esquema
+from models.indice_busca import IndiceBusca
+
+_lock_busca = threading.Lock()
+
+
+class TarefasStorage:
+    """Interface comum dos backends de armazenamento de tarefas (Sheets, SQLite)."""
+
+    # ordem oficial das colunas: models.tarefa.COLUNAS (Tarefa.to_linha)
+    COLUNAS = esquema.COLUNAS
+    FORMATO_CARIMBO = esquema.FORMATO_CARIMBO
+    COLUNAS_NOTA = ["id_tarefa", "data_hora", "usuario", "texto"]
+    COLUNAS_LOG = ["data_hora", "usuario", "id_tarefa", "campo", "valor_antigo", "valor_novo"]
+
+    def carregar_tarefas(self, columns=None, autor: str = None) -> pd.DataFrame:
+        """Tarefas já tipadas (`models.tarefa.tipar`): as colunas pedidas + derivadas (_dt, autor_norm).
+
+        Com `autor`, só as linhas dele (comparação normalizada), lidas por um índice
+        por autor em vez de filtrar a tabela inteira.
+        """
+        raise NotImplementedError
+
+    def iterar_tarefas(self, bloco: int = 5000):
+        """Gera blocos de linhas de tarefas (na ordem de COLUNAS), sem montar a tabela inteira."""
+        raise NotImplementedError
+
+    def carregar_logs(self) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def iterar_logs(self, posicao: int = 0, bloco: int = 5000):
+        """Gera blocos de linhas de log (data_hora, usuario, id_tarefa, campo, valor_antigo, valor_novo)
+        a partir da `posicao`-ésima linha, em ordem de gravação."""
+        raise NotImplementedError
+
+    def usuarios_nos_logs(self) -> list:
+        raise NotImplementedError
+
+    def pagina_de_logs(self, cursor=None, tamanho: int = 100, usuario: str = None, id_contem: str = None):
+        """Página de logs do mais novo para o mais antigo: (DataFrame, cursor seguinte ou None)."""
+        raise NotImplementedError
+
+    def adicionar_tarefa(self, tarefa, autor: str, historico: str = ""):
+        raise NotImplementedError
+
+    def adicionar_tarefas(self, tarefas: list, autor: str, historicos: list = None) -> int:
+        """Grava várias tarefas novas; retorna quantas foram gravadas.
+
+        Esta versão grava uma a uma; os backends a sobrescrevem para gravar o lote de uma vez.
+        """
+        historicos = historicos or [""] * len(tarefas)
+        for tarefa, historico in zip(tarefas, historicos):
+            self.adicionar_tarefa(tarefa, autor, historico)
+        return len(tarefas)
+
+    def atualizar_tarefa(self, task_id: str, updates: dict, usuario: str = "Sistema", versao: int = None) -> bool:
+        """Atualiza campos + 'ultima_atualizacao', sobe a 'versao' e registra logs.
+
+        False se a tarefa não existe ou se houve conflito: com `versao` (a que o usuário
+        viu), qualquer gravação desde então; sem ela, outra gravação nos mesmos campos.
+        """
+        raise NotImplementedError
+
+    def adicionar_nota(self, task_id: str, usuario: str, nota: str, acao: str = "") -> bool:
+        """Acrescenta uma nota (registro append-only, com timestamp/autor) ao histórico da tarefa."""
+        raise NotImplementedError
+
+    def atualizar_tarefas(self, task_ids: list, updates: dict, usuario: str = "Sistema") -> list:
+        """Aplica os mesmos `updates` a várias tarefas; retorna os ids atualizados.
+
+        Esta versão grava uma a uma; os backends a sobrescrevem para gravar o lote de uma vez.
+        """
+        return [i for i in dict.fromkeys(task_ids) if self.atualizar_tarefa(i, updates, usuario)]
+
+    def adicionar_notas(self, task_ids: list, usuario: str, nota: str, acao: str = "") -> list:
+        """A mesma nota no histórico de várias tarefas; retorna os ids anotados."""
+        return [i for i in dict.fromkeys(task_ids) if self.adicionar_nota(i, usuario, nota, acao)]
+
+    def carregar_notas(self) -> dict:
+        """id da tarefa -> linhas das notas, na ordem em que foram gravadas (não alterar)."""
+        raise NotImplementedError
+
+    def exportar_csv(self, destino, tipo: str = "tarefas", autor: str = None, bloco: int = 5000) -> int:
+        """Escreve tarefas ou logs em `destino` (arquivo texto) bloco a bloco; retorna o nº de linhas.
+
+        Com `autor`, exporta só as tarefas dele (não se aplica aos logs).
+        """
+        escritor = csv.writer(destino)
+        if tipo == "tarefas":
+            colunas, blocos = self.COLUNAS, self.iterar_tarefas(bloco)
+        else:
+            colunas, blocos = self.COLUNAS_LOG, self.iterar_logs(0, bloco)
+        i_autor = self.COLUNAS.index("autor")
+        autor = autor.strip().lower() if autor and tipo == "tarefas" else None
+        escritor.writerow(colunas)
+        total = 0
+        for linhas in blocos:
+            linhas = [(list(l) + [""] * len(colunas))[:len(colunas)] for l in linhas]
+            if autor is not None:
+                linhas = [l for l in linhas if str(l[i_autor]).strip().lower() == autor]
+            escritor.writerows(linhas)
+            total += len(linhas)
+        return total
+
+    @classmethod
+    def formatar_nota(cls, usuario: str, nota: str, acao: str = "") -> tuple:
+        """(data_hora, linha) no formato usado no histórico."""
+        stamp = datetime.now().strftime(cls.FORMATO_CARIMBO)
+        return stamp, f"[{stamp}] {usuario}: {acao} {nota}".strip()
+
+    @staticmethod
+    def _juntar(base: str, notas: list) -> str:
+        return "\n".join(([base] if base else []) + notas)
+
+    def historico_de(self, task_id: str, base: str = "") -> str:
+        """Materializa o histórico: texto da coluna 'historico' + notas da tarefa."""
+        return self._juntar(base, self.carregar_notas().get(task_id, []))
+
+    def materializar_historico(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Cópia de `df` com a coluna 'historico' completa (só para páginas que a exibem)."""
+        notas = self.carregar_notas()
+        df = df.copy()
+        bases = df["historico"] if "historico" in df.columns else [""] * len(df)
+        df["historico"] = [self._juntar(b, notas.get(i, [])) for i, b in zip(df["id"], bases)]
+        return df
+
+    def invalidar_cache(self, linhas=()):
+        pass
+
+    # -----------------------------
+    # Busca textual (índice invertido por autor)
+    # -----------------------------
+    _indices_busca = None  # autor normalizado -> IndiceBusca, criado na primeira busca do autor
+    _construcoes = None  # autor normalizado -> Lock da construção do índice dele
+    _diarios = None  # autor normalizado -> escritas ocorridas durante a construção
+
+    def _notas_de(self, ids: list) -> dict:
+        notas = self.carregar_notas()
+        return {i: notas[i] for i in ids if i in notas}
+
+    def _construir_indice_busca(self, autor: str) -> tuple:
+        """(IndiceBusca com as tarefas do autor, notas usadas na construção)."""
+        indice = IndiceBusca()
+        df = self.carregar_tarefas(columns=["id", "titulo", "historico"], autor=autor)
+        notas = self._notas_de(df["id"].tolist())
+        for task_id, titulo, historico in zip(df["id"], df["titulo"], df["historico"]):
+            indice.atualizar(task_id, titulo=titulo, historico=historico, notas="\n".join(notas.get(task_id, [])))
+        return indice, notas
+
+    def _indice_busca(self, autor: str) -> IndiceBusca:
+        """Índice do autor, construído na primeira vez fora do lock global.
+
+        Só quem busca o mesmo autor espera a construção. As escritas feitas enquanto
+        ela corre vão para um diário, reaplicado antes de o índice ser publicado.
+        """
+        chave = esquema.normalizar_autor(autor)
+        with _lock_busca:
+            if self._indices_busca is None:
+                self._indices_busca, self._construcoes, self._diarios = {}, {}, {}
+            indice = self._indices_busca.get(chave)
+            if indice is not None:
+                return indice
+            lock = self._construcoes.setdefault(chave, threading.Lock())
+        with lock:
+            with _lock_busca:
+                indice = self._indices_busca.get(chave)
+                if indice is not None:
+                    return indice
+                # aberto antes da leitura: o que for gravado depois dela cai no diário
+                self._diarios[chave] = []
+            try:
+                indice, notas = self._construir_indice_busca(autor)
+            except Exception:
+                with _lock_busca:
+                    del self._diarios[chave]
+                raise
+            with _lock_busca:
+                for tipo, task_id, valor, dono in self._diarios.pop(chave):
+                    if tipo == "campos" and (task_id in indice or dono == chave):
+                        indice.atualizar(task_id, **valor)
+                    elif tipo == "nota" and task_id in indice and valor not in notas.get(task_id, []):
+                        indice.acrescentar(task_id, "notas", valor)
+                self._indices_busca[chave] = indice
+        return indice
+
+    def preparar_busca(self, autor: str):
+        """Constrói o índice de busca do autor antes da primeira consulta (ex.: no aquecimento)."""
+        self._indice_busca(autor)
+
+    def buscar_tarefas(self, consulta: str, autor: str, limite: int = None) -> list:
+        """ids das tarefas do autor com todos os termos de `consulta` (sem acentos, último
+        termo ou `termo*` por prefixo), da mais relevante para a menos."""
+        return [task_id for task_id, _ in self._indice_busca(autor).buscar(consulta, limite)]
+
+    def _indexar(self, task_id: str, updates: dict, autor: str = None):
+        """Repassa titulo/historico alterados aos índices de busca já construídos.
+
+        A tarefa vai para o índice que já a contém ou, se nova, para o do `autor`.
+        """
+        campos = {k.strip().lower(): "" if v is None else str(v) for k, v in updates.items()}
+        campos = {k: v for k, v in campos.items() if k in ("titulo", "historico")}
+        if not campos:
+            return
+        dono = esquema.normalizar_autor(autor) if autor is not None else None
+        with _lock_busca:
+            for diario in (self._diarios or {}).values():
+                diario.append(("campos", task_id, campos, dono))
+            indices = list((self._indices_busca or {}).items())
+        for chave, indice in indices:
+            if task_id in indice or chave == dono:
+                indice.atualizar(task_id, **campos)
+
+    def _indexar_nota(self, task_id: str, linha: str):
+        with _lock_busca:
+            for diario in (self._diarios or {}).values():
+                diario.append(("nota", task_id, linha, None))
+            indices = list((self._indices_busca or {}).values())
+        for indice in indices:
+            if task_id in indice:
+                indice.acrescentar(task_id, "notas", linha)
@@ -0,0 +1,27 @@
+import io
+from unittest import mock
+
+from models.importador_csv import ImportadorCSV
+from models.tarefa import numero_versao
+
+
+def _csv(n: int) -> io.BytesIO:
+    linhas = ["titulo,categoria,prazo"] + [f"Tarefa {i},Pessoal,01/02/2024" for i in range(n)]
+    return io.BytesIO("\n".join(linhas).encode("utf-8"))
+
+
+def test_ids_nao_repetem_os_existentes():
+    sequencia = iter(["aaaaaaaa", "bbbbbbbb", "aaaaaaaa", "cccccccc", "dddddddd"])
+    with mock.patch("models.tarefa.uuid.uuid4", side_effect=lambda: next(sequencia)):
+        importador = ImportadorCSV(_csv(2), existentes={"bbbbbbbb"})
+        tarefas = [t for lote in importador.blocos() for t, _ in lote]
+    assert [t.id for t in tarefas] == ["aaaaaaaa", "cccccccc"]
+    assert all(t.versao == f"{t.id}:1" and numero_versao(t.versao) == 1 for t in tarefas)
+
+
+def test_linhas_invalidas():
+    arquivo = io.BytesIO("titulo;categoria;prazo\n;Pessoal;01/02/2024\nOk;Pessoal;2024-02-01\n".encode("utf-8"))
+    importador = ImportadorCSV(arquivo)
+    lotes = list(importador.blocos())
+    assert importador.lidas == 2 and importador.invalidas == 1
+    assert lotes[0][0][0].prazo == "01/02/2024"
@@ -0,0 +1,28 @@
+from models.indice_busca import IndiceBusca
+
+
+def _indice():
+    indice = IndiceBusca()
+    indice.atualizar("a", titulo="Reunião com cliente", historico="revisar relatório")
+    indice.atualizar("b", titulo="Relatório mensal", historico="reunião curta")
+    indice.atualizar("c", titulo="Testar código")
+    return indice
+
+
+def test_acentos_e_ranking():
+    assert [d for d, _ in _indice().buscar("reuniao")] == ["a", "b"]
+
+
+def test_prefixo():
+    indice = _indice()
+    assert {d for d, _ in indice.buscar("rel")} == {"a", "b"}
+    assert indice.buscar("re") == []  # curto demais para prefixo
+    assert [d for d, _ in indice.buscar("test")] == ["c"]
+
+
+def test_expansoes_limitadas():
+    indice = IndiceBusca()
+    for i in range(IndiceBusca.MAX_EXPANSOES + 10):
+        indice.atualizar(f"t{i}", titulo=f"palavra{i} comum")
+    indice.atualizar("x", titulo="palavra0 palavra1")
+    assert len(indice.buscar("comum pala")) == IndiceBusca.MAX_EXPANSOES
@@ -0,0 +1,50 @@
+from benchmarks.fake_sheets import FakeClient, FakeSpreadsheet
+from services.google_sheets_service import GoogleSheetsService, LogBuffer
+
+
+def _servico(n_logs: int, raro_a_cada: int):
+    planilha = FakeSpreadsheet()
+    planilha.criar("Tarefas", [GoogleSheetsService.COLUNAS])
+    logs = [GoogleSheetsService.COLUNAS_LOG]
+    for i in range(n_logs):
+        usuario = "raro" if i % raro_a_cada == 0 else "comum"
+        logs.append([f"01/01/2024 10:{i % 60:02d}:00", usuario, f"t{i}", "status", "", "Concluída"])
+    planilha.criar("Logs", logs)
+    return GoogleSheetsService("teste", cota_por_minuto=10 ** 9, cliente=FakeClient(planilha)), planilha
+
+
+def test_pagina_filtrada_le_em_blocos_grandes():
+    svc, planilha = _servico(20000, 400)
+    svc.pagina_de_logs(tamanho=1)  # índice de partições já montado
+    antes = planilha.chamadas()["get"]
+    pagina, cursor = svc.pagina_de_logs(tamanho=20, usuario="raro")
+    assert len(pagina) == 20 and set(pagina["usuario"]) == {"raro"}
+    assert planilha.chamadas()["get"] - antes <= 2
+    # a próxima página continua de onde a anterior parou
+    resto, cursor = svc.pagina_de_logs(cursor, tamanho=100, usuario="raro")
+    assert len(resto) == 30 and cursor is None
+    assert not set(pagina["id_tarefa"]) & set(resto["id_tarefa"])
+    svc.logs.fechar()
+
+
+def test_log_buffer_desiste_de_aba_que_sempre_falha():
+    class AbaQuebrada:
+        def append_rows(self, linhas):
+            raise RuntimeError("aba removida")
+
+    gravadas = []
+
+    class Aba:
+        def append_rows(self, linhas):
+            gravadas.extend(linhas)
+            return {}
+
+    buffer = LogBuffer(lambda chave: AbaQuebrada() if chave == "velha" else Aba(),
+                       intervalo=60, particao=lambda linha: linha[0], max_falhas=3)
+    buffer.adicionar([["velha", 1], ["nova", 2]])
+    for _ in range(3):
+        buffer.flush()
+    assert buffer.pendentes() == 0
+    assert list(buffer.descartadas) == [["velha", 1]]
+    assert gravadas == [["nova", 2]]
+    buffer.fechar()
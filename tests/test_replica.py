@@ -0,0 +1,49 @@
+from benchmarks.fake_sheets import FakeAPIError, FakeClient, FakeSpreadsheet
+from models.tarefa import COLUNAS, Tarefa
+from services.google_sheets_service import GoogleSheetsService
+from services.sqlite_service import SQLiteService
+
+
+def _replica():
+    planilha = FakeSpreadsheet()
+    aba = planilha.criar("Tarefas", [COLUNAS])
+    replica = GoogleSheetsService("teste", cota_por_minuto=10 ** 9, cliente=FakeClient(planilha))
+    replica.sheet.espera_base = 0.01
+    return replica, aba
+
+
+def _aplicar_e_falhar(aba, nome):
+    """Faz a próxima chamada `nome` ser aplicada e depois responder 503."""
+    original = getattr(aba, nome)
+
+    def chamada(*args, **kwargs):
+        setattr(aba, nome, original)
+        original(*args, **kwargs)
+        raise FakeAPIError(503)
+    setattr(aba, nome, chamada)
+
+
+def test_append_aplicado_antes_do_5xx_nao_duplica():
+    replica, aba = _replica()
+    svc = SQLiteService(":memory:", replica=replica)
+    tarefas = [Tarefa(f"Tarefa {i}", "Pessoal", "01/02/2024") for i in range(3)]
+    _aplicar_e_falhar(aba, "append_rows")
+    svc.adicionar_tarefas(tarefas, "Ana")
+    svc.aguardar_replica()
+    ids = [l[0] for l in aba.linhas[1:]]
+    assert sorted(ids) == sorted(t.id for t in tarefas)
+    replica.logs.fechar()
+
+
+def test_nota_nao_e_repetida_apos_5xx():
+    replica, aba = _replica()
+    svc = SQLiteService(":memory:", replica=replica)
+    tarefa = Tarefa("Tarefa", "Pessoal", "01/02/2024")
+    svc.adicionar_tarefa(tarefa, "Ana")
+    svc.aguardar_replica()
+    notas = replica._notas_sheet()._ws
+    _aplicar_e_falhar(notas, "append_row")
+    svc.adicionar_nota(tarefa.id, "Ana", "olá")
+    svc.aguardar_replica()
+    assert len(notas.linhas) == 2  # cabeçalho + uma nota
+    replica.logs.fechar()
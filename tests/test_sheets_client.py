@@ -0,0 +1,46 @@
+import pytest
+
+from benchmarks.fake_sheets import FakeAPIError, FakeClient, FakeSpreadsheet, FakeWorksheet
+from models.tarefa import COLUNAS
+from services.google_sheets_service import GoogleSheetsService
+from services.sheets_client import LimitadorCota, WorksheetClient
+
+
+def _cliente(aba, tentativas: int = 6):
+    return WorksheetClient(aba, LimitadorCota(10 ** 9), tentativas=tentativas, espera_base=0.001)
+
+
+def test_429_e_repetido():
+    aba = FakeWorksheet("Tarefas", [["id"], ["a"]])
+    aba.falhar("get", 429, 429)
+    assert _cliente(aba).get("A1:A2") == [["id"], ["a"]]
+    assert aba.chamadas["get"] == 3
+
+
+def test_5xx_so_repetido_em_chamada_idempotente():
+    aba = FakeWorksheet("Tarefas", [["id"]])
+    aba.falhar("get", 503)
+    assert _cliente(aba).get("A1") == [["id"]]
+    aba.falhar("append_rows", 503)
+    with pytest.raises(FakeAPIError):
+        _cliente(aba).append_rows([["b"]])
+    assert aba.chamadas["append_rows"] == 1 and len(aba.linhas) == 1
+
+
+def test_429_esgotado_propaga():
+    aba = FakeWorksheet("Tarefas", [["id"]])
+    aba.falhar("get", *[429] * 3)
+    with pytest.raises(FakeAPIError):
+        _cliente(aba, tentativas=3).get("A1")
+
+
+def test_carregar_tarefas_propaga_erro_da_api():
+    planilha = FakeSpreadsheet()
+    aba = planilha.criar("Tarefas", [COLUNAS])
+    svc = GoogleSheetsService("teste", cota_por_minuto=10 ** 9, cliente=FakeClient(planilha))
+    svc.sheet.tentativas, svc.sheet.espera_base = 2, 0.001
+    aba.falhar("batch_get", 429, 429)
+    with pytest.raises(FakeAPIError):
+        svc.carregar_tarefas()
+    assert svc.carregar_tarefas().empty  # passada a falha, carrega normalmente
+    svc.logs.fechar()
@@ -0,0 +1,74 @@
+import pandas as pd
+
+from benchmarks.fake_sheets import FakeClient, FakeSpreadsheet
+from models.tarefa import COLUNAS, Tarefa, numero_versao, proxima_versao, tipar
+from services.google_sheets_service import GoogleSheetsService
+from services.sqlite_service import SQLiteService
+
+
+def test_tipar_sem_linhas():
+    df = tipar(pd.DataFrame(columns=COLUNAS))
+    assert df.empty
+    assert pd.api.types.is_integer_dtype(df["versao"])
+
+
+def test_tipar_versao():
+    linhas = [[""] * 9 + [v] for v in ("a:3", "b:4*", "7", "")]
+    assert tipar(pd.DataFrame(linhas, columns=COLUNAS))["versao"].tolist() == [3, 4, 7, 0]
+
+
+def test_numero_e_proxima_versao():
+    assert numero_versao("12345678:3*") == 3
+    assert proxima_versao("12345678:3", "12345678") == "12345678:4"
+    assert proxima_versao("", "abc") == "abc:1"
+
+
+def test_linha_sai_dos_slots():
+    tarefa = Tarefa("Ler", "Estudo", "01/02/2025")
+    tarefa.historico, tarefa.autor = "nota", "ana"
+    linha = tarefa.to_linha()
+    assert len(linha) == len(COLUNAS)
+    assert dict(zip(COLUNAS, linha))["historico"] == "nota"
+    assert dict(zip(COLUNAS, linha))["autor"] == "ana"
+    assert linha[-1] == tarefa.versao
+
+
+def test_sqlite_grava_autor_e_historico():
+    svc = SQLiteService(":memory:")
+    svc.adicionar_tarefa(Tarefa("Ler", "Estudo", "01/02/2025"), "ana", "primeira nota")
+    linha = svc.carregar_tarefas().iloc[0]
+    assert (linha["autor"], linha["historico"]) == ("ana", "primeira nota")
+
+
+def test_sqlite_vazio():
+    svc = SQLiteService(":memory:")
+    assert svc.carregar_tarefas().empty
+    assert svc.carregar_tarefas(columns=["id", "titulo"], autor="ninguém").empty
+
+
+def _planilha(linhas):
+    planilha = FakeSpreadsheet()
+    planilha.criar("Tarefas", [COLUNAS] + linhas)
+    return planilha
+
+
+def _servico(planilha):
+    return GoogleSheetsService("teste", cota_por_minuto=10 ** 9, cliente=FakeClient(planilha))
+
+
+def test_planilha_so_com_cabecalho():
+    svc = _servico(_planilha([]))
+    assert svc.carregar_tarefas().empty
+    assert svc.carregar_tarefas(autor="ninguém").empty
+    svc.logs.fechar()
+
+
+def test_importar_da_replica_mantem_versao_crua():
+    linha = ["12345678", "01/01/2024 10:00", "Tarefa", "Pessoal", "02/01/2024", "Pendente", "", "", "Ana", "12345678:3"]
+    replica = _servico(_planilha([linha]))
+    svc = SQLiteService(":memory:", replica=replica)
+    assert svc.conn.execute("SELECT versao FROM tarefas").fetchone()[0] == "12345678:3"
+    assert svc.atualizar_tarefa("12345678", {"status": "Concluída"}, usuario="Ana")
+    svc.aguardar_replica()
+    assert replica.sheet.get("J2") == [["12345678:4"]]
+    replica.logs.fechar()